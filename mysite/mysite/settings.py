@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,11 +32,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'todolist.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'todolist.activity.GuestActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -44,7 +47,8 @@ ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to ServerTimingMiddleware
+        'BACKEND': 'todolist.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -108,6 +112,20 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic gives files names with hash of their content and makes gzip (and brotli) copies of them,
+# so the web server can send them precompressed with far-future expiry
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'todolist.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -128,10 +146,73 @@ GUEST_USER_CONVERT_URL = 'todolist:login'
 LOGIN_REDIRECT_URL = 'todolist:dashboard'
 
 
+# Cache
+
+# dashboard versions and their rebuild locks have to be seen by every worker and by the scheduler,
+# so production runs on redis (REDIS_URL, needs the redis package);
+# locmem cache belongs to its process and fits only a single one, e.g. runserver and tests
+
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+DASHBOARD_CACHE_TIMEOUT = 300 # 5 minutes
+TASK_ROW_CACHE_TIMEOUT = 3600 # 1 hour, rows are keyed by the version of the task anyway
+
+
 # Sessions
 
 SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
 
 SESSION_COOKIE_AGE = 1209600 # 2 weeks
 
-SESSION_SAVE_EVERY_REQUEST = True
\ No newline at end of file
+SESSION_SAVE_EVERY_REQUEST = True
+
+GUEST_ACTIVITY_INTERVAL = 86400 # 1 day, how often requests of a guest move its last_login
+
+# Scheduler
+
+COMPLETED_TASKS_PURGE_BATCH_SIZE = 1000
+
+COMPLETED_TASKS_PURGE_PAUSE = 0.1 # seconds between batches, lets other writers in
+
+COMPLETED_TASKS_PURGE_TIME_BUDGET = 600 # 10 minutes
+
+# guests are purged once their session has expired: sessions live SESSION_COOKIE_AGE after the last request,
+# which moved last_login at most GUEST_ACTIVITY_INTERVAL before
+GUEST_USER_MAX_AGE = SESSION_COOKIE_AGE + GUEST_ACTIVITY_INTERVAL
+
+GUEST_PURGE_BATCH_SIZE = 500
+
+DEADLINE_SWEEP_WINDOW = 86400 # 1 day, how far back the first deadline sweep looks
+
+
+# Email
+# overdue digests are written to files locally, set an smtp backend in production
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+DEFAULT_FROM_EMAIL = 'todolist@localhost'
+
+
+# Server timing
+
+SERVER_TIMING_SAMPLE_RATE = 0.1 # share of requests that are timed
+
+
+# Query budgets
+# add 'todolist.querybudget.QueryBudgetMiddleware' to the end of MIDDLEWARE to check requests against budgets of their views
+
+QUERY_BUDGET_MODE = 'log' # 'log' or 'raise'
@@ -0,0 +1,68 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guest_user.functions import get_guest_model
+
+
+# time of the last recorded activity, kept in the session so most requests dont touch the database
+SEEN_KEY = 'todolist:seen'
+
+
+def is_seen_recently(seen):
+    return seen is not None and time.time() - seen < getattr(settings, 'GUEST_ACTIVITY_INTERVAL', 86400)
+
+def mark_seen(request):
+    '''Moves last_login of the guest to now, so guests that only read pages arent purged as inactive'''
+    user = request.user
+
+    if not user.is_authenticated:
+        return
+
+    # one statement, it does nothing for regular users
+    guest = get_guest_model().objects.filter(user_id=user.pk).values('user_id')
+    User.objects.filter(pk__in=guest).update(last_login=timezone.now())
+
+    request.session[SEEN_KEY] = time.time()
+
+def record_login(sender, request, user, **kwargs):
+    '''Log in moves last_login itself, so the next requests dont have to'''
+    if request is not None and hasattr(request, 'session'):
+        request.session[SEEN_KEY] = time.time()
+
+
+class GuestActivityMiddleware:
+    '''Records activity of guests at most once per GUEST_ACTIVITY_INTERVAL, reads count as well as writes'''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+
+        # after the view, since guests are made by the views on the first visit
+        if not is_seen_recently(request.session.get(SEEN_KEY)):
+            mark_seen(request)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        if not is_seen_recently(await request.session.aget(SEEN_KEY)):
+            await sync_to_async(mark_seen)(request)
+
+        return response
@@ -1,16 +1,54 @@
+import time
+
 from django.contrib import admin
 from django.urls import reverse
 
 from .models import Task, TaskGroup, CompletedTask
-from .views import make_completed_task_record
+from .views import complete_tasks
+from .caching import touch_users
+from .search import filter_tasks
 
 
 @admin.action(description='Complete selected tasks')
 def complete_task(modeladmin, request, queryset):
     '''Makes completed task records for selected tasks'''
-    for task in queryset:
-        make_completed_task_record(task)
-        task.delete()
+    start = time.perf_counter()
+    completed = complete_tasks(queryset)
+    duration = time.perf_counter() - start
+
+    modeladmin.message_user(
+        request, 
+        f'Completed {completed} tasks in {duration:.2f}s ({completed / max(duration, 1e-6):.0f} tasks/s).',
+    )
+
+
+class TouchOwnersMixin:
+    '''Marks data of owners whose objects were changed in admin as modified, which invalidates their cached pages'''
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        touch_users(obj.owner_id, form.initial.get('owner'))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        touch_users(obj.owner_id)
+
+    def delete_queryset(self, request, queryset):
+        owner_ids = set(queryset.values_list('owner_id', flat=True))
+
+        super().delete_queryset(request, queryset)
+        touch_users(*owner_ids)
+
+
+class OutdatedListFilter(admin.SimpleListFilter):
+    title = 'outdated'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return [('outdated', 'Outdated'), ('active', 'Active')]
+
+    def queryset(self, request, queryset):
+        return queryset.with_status(self.value())
 
 
 class TaskTaskGroupIntermediaryInline(admin.TabularInline):
@@ -24,9 +62,9 @@ class TaskInline(TaskTaskGroupIntermediaryInline):
     verbose_name = 'Task'
 
 
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(TouchOwnersMixin, admin.ModelAdmin):
     list_display = ['name', 'owner', 'deadline', 'is_outdated']
-    list_filter = ['deadline']
+    list_filter = [OutdatedListFilter, 'deadline']
     search_fields = ['name']
     actions = [complete_task]
 
@@ -38,11 +76,29 @@ class TaskAdmin(admin.ModelAdmin):
     
     inlines = [TaskGroupInline]
 
+    def get_queryset(self, request):
+        # is_outdated column is sorted by the annotation
+        return super().get_queryset(request).with_outdated()
+
+    def get_search_results(self, request, queryset, search_term):
+        # full-text index instead of LIKE '%term%' scans, where it is available
+        tasks = filter_tasks(queryset, search_term)
+
+        if tasks is None:
+            return super().get_search_results(request, queryset, search_term)
+
+        return tasks, False
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # groups of the inline are saved after the task itself
+        Task.objects.filter(pk=form.instance.pk).touch()
+
     def view_on_site(self, obj):
         url = reverse('todolist:detail', args=[obj.pk])
         return url
 
-class TaskGroupAdmin(admin.ModelAdmin):
+class TaskGroupAdmin(TouchOwnersMixin, admin.ModelAdmin):
     list_display = ['name', 'owner']
     search_fields = ['name']
 
@@ -52,7 +108,26 @@ class TaskGroupAdmin(admin.ModelAdmin):
     
     inlines = [TaskInline]
 
-class CompletedTaskAdmin(admin.ModelAdmin):
+    # rows of tasks show names of their groups, so tasks are marked as changed along with the groups
+
+    def save_related(self, request, form, formsets, change):
+        Link = Task.group.through
+        task_ids = set(Link.objects.filter(taskgroup=form.instance).values_list('task_id', flat=True))
+
+        super().save_related(request, form, formsets, change)
+
+        task_ids.update(Link.objects.filter(taskgroup=form.instance).values_list('task_id', flat=True))
+        Task.objects.filter(pk__in=task_ids).touch()
+
+    def delete_model(self, request, obj):
+        Task.objects.filter(group=obj).touch()
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        Task.objects.filter(group__in=queryset).touch()
+        super().delete_queryset(request, queryset)
+
+class CompletedTaskAdmin(TouchOwnersMixin, admin.ModelAdmin):
     list_display = ['name', 'owner']
     search_fields = ['name']
 
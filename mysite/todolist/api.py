@@ -0,0 +1,322 @@
+import json
+from functools import wraps
+
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+
+from guest_user.functions import is_guest_user
+from guest_user.decorators import allow_guest_user, regular_user_required
+
+from .models import Task, TaskGroup, CompletedTask
+from .forms import TaskAPIForm, TaskGroupAPIForm
+from .pagination import KeysetPaginator, InvalidCursor
+from .views import complete_tasks, delete_tasks, delete_groups, link_groups
+from .caching import touch_users
+from .querybudget import query_budget
+
+
+# fields sent to the client, taken straight from values() instead of model instances
+TASK_FIELDS = ['id', 'name', 'description', 'priority', 'deadline', 'creation_date']
+GROUP_FIELDS = ['id', 'name']
+COMPLETED_TASK_FIELDS = ['id', 'name', 'complete_date']
+
+PAGE_SIZE = 100
+# the group picker shows few groups at once and asks for more as user scrolls
+LOOKUP_PAGE_SIZE = 20
+
+# priorities are sent as their labels, as they were before being stored as numbers
+PRIORITY_LABELS = dict(Task.Priority.choices)
+PRIORITY_VALUES = {label: value for value, label in Task.Priority.choices}
+
+
+class APIError(Exception):
+    '''Makes 400 response with given errors'''
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def api_view(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except APIError as error:
+            return JsonResponse({'errors': error.errors}, status=400)
+
+    return wrapper
+
+def read_batch(request, item_type=dict):
+    '''Reads JSON array from the request body'''
+    try:
+        batch = json.loads(request.body)
+    except ValueError:
+        raise APIError(['Request body isnt valid JSON.'])
+
+    # bool is an int in Python, but true isnt an id
+    if not isinstance(batch, list) or not all(isinstance(item, item_type) and not isinstance(item, bool) for item in batch):
+        raise APIError([f'Request body should be an array of {"objects" if item_type is dict else "ids"}.'])
+
+    return batch
+
+def read_ids(request):
+    return read_batch(request, item_type=int)
+
+def list_page(request, queryset, ordering, per_page=PAGE_SIZE):
+    '''Returns page of values() rows after the cursor given in request, with the cursor of the next one'''
+    paginator = KeysetPaginator(queryset, ordering, per_page)
+
+    try:
+        page = paginator.get_page(after=request.GET.get('after'))
+    except InvalidCursor:
+        raise APIError(['Invalid cursor.'])
+
+    return page.object_list, page.next_cursor
+
+def add_groups(tasks):
+    '''Adds ids of groups and priority labels to serialized tasks, groups are read in one query'''
+    groups = {task['id']: [] for task in tasks}
+    links = Task.group.through.objects.filter(task_id__in=groups.keys()).values_list('task_id', 'taskgroup_id')
+
+    for task_id, group_id in links:
+        groups[task_id].append(group_id)
+
+    for task in tasks:
+        task['group'] = groups[task['id']]
+        task['priority'] = PRIORITY_LABELS[task['priority']]
+
+    return tasks
+
+def serialize_tasks(task_ids):
+    return add_groups(list(Task.objects.filter(pk__in=task_ids).order_by('deadline', 'id').values(*TASK_FIELDS)))
+
+def validate_tasks(user_id, batch, tasks=None):
+    '''Validates every item of the batch, checking all of their groups with a single query;
+    Returns tasks built from the items with the group ids of each one'''
+    forms = []
+    groups = []
+    errors = {}
+
+    for index, item in enumerate(batch):
+        task = tasks[index] if tasks else None
+        data = item
+
+        if task:
+            # fields that arent given stay as they are
+            data = {field: getattr(task, field) for field in TaskAPIForm.Meta.fields}
+            data.update(item)
+
+        # labels only, other values are left for the form to reject
+        if isinstance(data.get('priority'), str) and data['priority'] in PRIORITY_VALUES:
+            data = {**data, 'priority': PRIORITY_VALUES[data['priority']]}
+
+        form = TaskAPIForm(data, instance=task)
+        task_groups = item.get('group')
+
+        if task_groups is not None and (
+            not isinstance(task_groups, list) or not all(isinstance(group_id, int) and not isinstance(group_id, bool) for group_id in task_groups)
+        ):
+            form.add_error(None, 'Groups should be an array of ids.')
+            task_groups = None
+
+        elif task_groups is not None:
+            # repeated ids would be repeated links
+            task_groups = list(dict.fromkeys(task_groups))
+
+        if not form.is_valid():
+            errors[index] = form.errors.get_json_data()
+
+        forms.append(form)
+        groups.append(task_groups)
+
+    requested_groups = {group_id for task_groups in groups for group_id in task_groups or []}
+    owned_groups = set(TaskGroup.objects.filter(owner_id=user_id, pk__in=requested_groups).values_list('pk', flat=True))
+
+    for index, task_groups in enumerate(groups):
+        if index not in errors and not set(task_groups or []) <= owned_groups:
+            errors[index] = {'group': [{'message': 'Some of the groups dont exist.', 'code': 'invalid_choice'}]}
+
+    if errors:
+        raise APIError(errors)
+
+    return [(form.save(commit=False), task_groups) for form, task_groups in zip(forms, groups)]
+
+
+@query_budget(3)
+@require_GET
+@allow_guest_user
+@api_view
+def TasksAPI(request):
+    tasks = Task.objects.filter(owner_id=request.user.id).values(*TASK_FIELDS)
+    tasks, next_cursor = list_page(request, tasks, ['deadline', 'id'])
+
+    return JsonResponse({'tasks': add_groups(tasks), 'next': next_cursor})
+
+@query_budget(10)
+@require_POST
+@allow_guest_user
+@api_view
+def CreateTasksAPI(request):
+    user_id = request.user.id
+    tasks_with_groups = validate_tasks(user_id, read_batch(request))
+
+    for task, groups in tasks_with_groups:
+        task.owner_id = user_id
+
+    with transaction.atomic():
+        Task.objects.bulk_create([task for task, groups in tasks_with_groups])
+        link_groups(tasks_with_groups, created=True)
+
+    touch_users(user_id)
+
+    task_ids = [task.pk for task, groups in tasks_with_groups]
+    return JsonResponse({'tasks': serialize_tasks(task_ids)}, status=201)
+
+@query_budget(11)
+@require_POST
+@allow_guest_user
+@api_view
+def UpdateTasksAPI(request):
+    user_id = request.user.id
+    batch = read_batch(request)
+
+    task_ids = [item.get('id') for item in batch]
+    valid_ids = [task_id for task_id in task_ids if isinstance(task_id, int) and not isinstance(task_id, bool)]
+    tasks = Task.objects.filter(owner_id=user_id).in_bulk(valid_ids)
+
+    missing = {index: {'id': [{'message': 'Task doesnt exist.', 'code': 'invalid'}]}
+               for index, task_id in enumerate(task_ids) if isinstance(task_id, bool) or task_id not in tasks}
+    if missing:
+        raise APIError(missing)
+
+    tasks_with_groups = validate_tasks(user_id, batch, tasks=[tasks[task_id] for task_id in task_ids])
+
+    updated_at = timezone.now()
+    for task, groups in tasks_with_groups:
+        task.updated_at = updated_at
+
+    with transaction.atomic():
+        Task.objects.bulk_update([task for task, groups in tasks_with_groups], [*TaskAPIForm.Meta.fields, 'updated_at'])
+        link_groups(tasks_with_groups)
+
+    touch_users(user_id)
+
+    return JsonResponse({'tasks': serialize_tasks(task_ids)})
+
+@query_budget(14)
+@require_POST
+@allow_guest_user
+@api_view
+def CompleteTasksAPI(request):
+    user = request.user
+    tasks = Task.objects.filter(owner_id=user.id, pk__in=read_ids(request))
+
+    guest = is_guest_user(user)
+
+    with transaction.atomic():
+        # guests dont have completed task records, same as in CompleteTask view
+        if guest:
+            completed = delete_tasks(tasks)
+        else:
+            # marks owners of the tasks itself
+            completed = complete_tasks(tasks)
+
+    if guest:
+        touch_users(user.id)
+
+    return JsonResponse({'completed': completed})
+
+@query_budget(6)
+@require_POST
+@allow_guest_user
+@api_view
+def DeleteTasksAPI(request):
+    user_id = request.user.id
+    deleted = delete_tasks(Task.objects.filter(owner_id=user_id, pk__in=read_ids(request)))
+
+    touch_users(user_id)
+
+    return JsonResponse({'deleted': deleted})
+
+@query_budget(2)
+@require_GET
+@allow_guest_user
+@api_view
+def GroupsAPI(request):
+    groups = TaskGroup.objects.filter(owner_id=request.user.id).values(*GROUP_FIELDS)
+    groups, next_cursor = list_page(request, groups, ['name', 'id'])
+
+    return JsonResponse({'groups': groups, 'next': next_cursor})
+
+@query_budget(2)
+@require_GET
+@allow_guest_user
+@api_view
+def GroupLookupAPI(request):
+    '''Groups of the user whose names start with q, for the group picker'''
+    groups = TaskGroup.objects.filter(owner_id=request.user.id)
+    prefix = request.GET.get('q', '').strip()
+
+    if prefix:
+        groups = groups.filter(name__istartswith=prefix)
+
+    groups, next_cursor = list_page(request, groups.values(*GROUP_FIELDS), ['name', 'id'], per_page=LOOKUP_PAGE_SIZE)
+
+    return JsonResponse({'groups': groups, 'next': next_cursor})
+
+@query_budget(4)
+@require_POST
+@allow_guest_user
+@api_view
+def CreateGroupsAPI(request):
+    forms = [TaskGroupAPIForm(item) for item in read_batch(request)]
+    errors = {index: form.errors.get_json_data() for index, form in enumerate(forms) if not form.is_valid()}
+
+    if errors:
+        raise APIError(errors)
+
+    groups = [form.save(commit=False) for form in forms]
+
+    for group in groups:
+        group.owner_id = request.user.id
+
+    TaskGroup.objects.bulk_create(groups)
+    touch_users(request.user.id)
+
+    group_ids = [group.pk for group in groups]
+    return JsonResponse({'groups': list(TaskGroup.objects.filter(pk__in=group_ids).values(*GROUP_FIELDS))}, status=201)
+
+@query_budget(7)
+@require_POST
+@allow_guest_user
+@api_view
+def DeleteGroupsAPI(request):
+    deleted = delete_groups(TaskGroup.objects.filter(owner_id=request.user.id, pk__in=read_ids(request)))
+    touch_users(request.user.id)
+
+    return JsonResponse({'deleted': deleted})
+
+@query_budget(3)
+@require_GET
+@regular_user_required
+@api_view
+def CompletedTasksAPI(request):
+    ctasks = CompletedTask.objects.filter(owner_id=request.user.id).values(*COMPLETED_TASK_FIELDS)
+    ctasks, next_cursor = list_page(request, ctasks, ['complete_date', 'id'])
+
+    return JsonResponse({'completed_tasks': ctasks, 'next': next_cursor})
+
+@query_budget(4)
+@require_POST
+@regular_user_required
+@api_view
+def CleanCompletedTasksAPI(request):
+    user_id = request.user.id
+    deleted, _ = CompletedTask.objects.filter(owner_id=user_id, pk__in=read_ids(request)).delete()
+
+    touch_users(user_id)
+
+    return JsonResponse({'deleted': deleted})
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.contrib.auth.signals import user_logged_in
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate, m2m_changed
 
 
 class TodolistConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todolist'
+
+    def ready(self):
+        from .search import ensure_index
+        from .models import Task, touch_linked_tasks
+        from .timing import install_query_timing
+        from .activity import record_login
+
+        post_migrate.connect(ensure_index, sender=self)
+        m2m_changed.connect(touch_linked_tasks, sender=Task.group.through)
+        connection_created.connect(install_query_timing)
+        user_logged_in.connect(record_login)
@@ -0,0 +1,139 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import REDIRECT_FIELD_NAME
+from django.http import Http404
+from django.shortcuts import render
+from django.utils import timezone
+from django.views import View
+
+from guest_user import settings as guest_user_settings
+from guest_user.functions import get_guest_model, maybe_create_guest_user, redirect_with_next
+
+from .models import Task, CompletedTask
+from .forms import TaskForm, TaskFilterForm
+from .pagination import KeysetPaginator, InvalidCursor
+from .views import IndexView, prefetch_user_groups, format_groups, render_task_rows, get_status
+from .caching import aget_dashboard, aget_passed_deadline
+from .querybudget import query_budget
+
+
+# Async versions of the read-heavy views, they dont hold a thread per request under ASGI.
+# Templates still touch the database (forms, guest check), so they are rendered in a thread.
+
+arender = sync_to_async(render)
+
+async def allow_guest_user(request):
+    '''Async counterpart of AllowGuestUserMixin, returns user of the request'''
+    user = await request.auser()
+
+    if user.is_anonymous:
+        await sync_to_async(maybe_create_guest_user)(request)
+        user = await sync_to_async(lambda: request.user)()
+
+    return user
+
+async def is_guest_user(user):
+    if user.is_anonymous:
+        return False
+
+    return await get_guest_model().objects.filter(user=user).aexists()
+
+
+@query_budget(7)
+class AsyncIndexView(View):
+    template_name = 'todolist/index.html'
+
+    async def get(self, request):
+        user = await allow_guest_user(request)
+
+        queryset = Task.objects.filter(owner_id=user.id)
+
+        # validation of groups queries the database
+        filter_form = TaskFilterForm(request.GET, user=user)
+        await sync_to_async(filter_form.is_valid)()
+
+        queryset = filter_form.filter(queryset.with_outdated())
+        paginator = KeysetPaginator(queryset, filter_form.get_ordering(), IndexView.paginate_by)
+
+        try:
+            page = await paginator.aget_page(after=request.GET.get('after'), before=request.GET.get('before'))
+        except InvalidCursor:
+            raise Http404('Invalid page')
+
+        await sync_to_async(render_task_rows)(page.object_list, user.id)
+
+        context = {
+            'task_list': page.object_list,
+            'page_obj': page,
+            'paginator': paginator,
+            'is_paginated': page.has_other_pages(),
+            'task_form': TaskForm(user=user),
+            'filter_form': filter_form,
+            'filter_query': filter_form.get_query_string(),
+        }
+
+        return await arender(request, self.template_name, context)
+
+@query_budget(5)
+class AsyncDetailView(View):
+    template_name = 'todolist/detail.html'
+
+    async def get(self, request, pk):
+        user = await allow_guest_user(request)
+
+        task = await Task.objects.prefetch_related(prefetch_user_groups(user.id)).filter(pk=pk, owner_id=user.id).afirst()
+
+        if task is None:
+            raise Http404('Task doesnt exist')
+
+        format_groups(task)
+
+        return await arender(request, self.template_name, {'task': task, 'object': task})
+
+@query_budget(8)
+class AsyncDashboardView(View):
+    template_name = 'todolist/dashboard.html'
+
+    async def get(self, request):
+        user = await request.auser()
+
+        # same redirects as RegularUserRequiredMixin does
+        if user.is_anonymous:
+            return redirect_with_next(request, settings.LOGIN_URL, REDIRECT_FIELD_NAME)
+
+        if await is_guest_user(user):
+            return redirect_with_next(request, guest_user_settings.CONVERT_URL, REDIRECT_FIELD_NAME)
+
+        status = get_status(request)
+
+        # beginning of the day in the current timezone
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        async def build():
+            completed_tasks = CompletedTask.objects.filter(owner_id=user.id)
+
+            # these queries dont depend on each other
+            task_list, completed_recently, completed_today = await asyncio.gather(
+                self.alist(Task.objects.filter(owner_id=user.id).with_status(status).order_by('deadline')[:5]),
+                self.alist(completed_tasks.order_by('complete_date')[:4]),
+                completed_tasks.filter(complete_date__gte=today).acount(),
+            )
+
+            return {
+                'task_list': task_list,
+                'completed_recently': completed_recently,
+                'completed_today': completed_today,
+            }
+
+        passed_deadline = await aget_passed_deadline(user.id, timezone.now())
+        dashboard = await aget_dashboard(user.id, today.date(), build, variant=status, passed_deadline=passed_deadline)
+
+        context = {**dashboard, 'status': status}
+
+        return await arender(request, self.template_name, context)
+
+    @staticmethod
+    async def alist(queryset):
+        return [obj async for obj in queryset.aiterator()]
@@ -0,0 +1,199 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Task, LastModified
+
+
+DASHBOARD_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+# how long other requests wait for the one that rebuilds the dashboard
+DASHBOARD_LOCK_TIMEOUT = 10
+
+TASK_ROW_TIMEOUT = getattr(settings, 'TASK_ROW_CACHE_TIMEOUT', 3600)
+
+
+def dashboard_version_key(user_id):
+    return f'todolist:dashboard_version:{user_id}'
+
+def get_dashboard_version(user_id):
+    '''Returns current version of the user`s dashboard;
+    New versions are taken from the clock, so eviction of the version never revives old payloads'''
+    key = dashboard_version_key(user_id)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+async def aget_dashboard_version(user_id):
+    '''Async version of get_dashboard_version'''
+    key = dashboard_version_key(user_id)
+    version = await cache.aget(key)
+
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+
+    return version
+
+def bump_dashboard_version(*user_ids):
+    '''Invalidates cached dashboards of given users'''
+    cache.delete_many([dashboard_version_key(user_id) for user_id in user_ids])
+
+def touch_users(*user_ids):
+    '''Marks data of given users as changed, it`s called by every write path;
+    Moves their last modified markers in one upsert and invalidates their cached dashboards'''
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+
+    if not user_ids:
+        return
+
+    now = timezone.now()
+    LastModified.objects.bulk_create(
+        [LastModified(user_id=user_id, value=now) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['value'],
+    )
+
+    bump_dashboard_version(*user_ids)
+
+def get_last_modified(user, deadlines_before):
+    '''Returns time of the last change of user`s data and the latest deadline of user`s tasks before given time, in one query;
+    Users that havent changed anything since markers were added get the time they joined'''
+    marker = LastModified.objects.filter(user_id=OuterRef('pk')).values('value')
+    deadline = Task.objects.filter(owner_id=OuterRef('pk'), deadline__lte=deadlines_before).order_by('-deadline').values('deadline')[:1]
+
+    value, passed_deadline = get_user_model().objects.filter(pk=user.pk).values_list(Subquery(marker), Subquery(deadline)).get()
+
+    return value or user.date_joined, passed_deadline
+
+async def aget_passed_deadline(user_id, now):
+    '''Returns the latest deadline of user`s tasks before now; Sync views take it from get_last_modified'''
+    return await Task.objects.filter(owner_id=user_id, deadline__lte=now).order_by('-deadline').values_list('deadline', flat=True).afirst()
+
+def dashboard_key(user_id, version, day, variant='', passed_deadline=None):
+    # tasks move from active to outdated without writes, so the latest passed deadline is a part of the key
+    passed = passed_deadline.timestamp() if passed_deadline else ''
+    return f'todolist:dashboard:{user_id}:{version}:{day.isoformat()}:{variant}:{passed}'
+
+def dashboard_lock_key(key):
+    return f'{key}:lock'
+
+def get_dashboard(user_id, day, build, variant='', passed_deadline=None):
+    '''Returns cached dashboard payload of the user for given day and variant (e.g. filter), calling build() on miss;
+    Only one request rebuilds the payload at a time, others wait for its result'''
+    key = dashboard_key(user_id, get_dashboard_version(user_id), day, variant, passed_deadline)
+    lock_key = dashboard_lock_key(key)
+
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    deadline = time.monotonic() + DASHBOARD_LOCK_TIMEOUT
+
+    while not cache.add(lock_key, True, DASHBOARD_LOCK_TIMEOUT):
+        time.sleep(0.05)
+
+        payload = cache.get(key)
+        if payload is not None:
+            return payload
+
+        # request holding the lock got stuck, so dont wait for it anymore
+        if time.monotonic() > deadline:
+            return build()
+
+    try:
+        payload = build()
+        cache.set(key, payload, DASHBOARD_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+    return payload
+
+async def aget_dashboard(user_id, day, build, variant='', passed_deadline=None):
+    '''Async version of get_dashboard, build is a coroutine function'''
+    key = dashboard_key(user_id, await aget_dashboard_version(user_id), day, variant, passed_deadline)
+    lock_key = dashboard_lock_key(key)
+
+    payload = await cache.aget(key)
+    if payload is not None:
+        return payload
+
+    deadline = time.monotonic() + DASHBOARD_LOCK_TIMEOUT
+
+    while not await cache.aadd(lock_key, True, DASHBOARD_LOCK_TIMEOUT):
+        await asyncio.sleep(0.05)
+
+        payload = await cache.aget(key)
+        if payload is not None:
+            return payload
+
+        if time.monotonic() > deadline:
+            return await build()
+
+    try:
+        payload = await build()
+        await cache.aset(key, payload, DASHBOARD_TIMEOUT)
+    finally:
+        await cache.adelete(lock_key)
+
+    return payload
+
+
+def task_row_key(task):
+    # outdated rows look different, while the task itself doesnt change
+    return f'todolist:task_row:{task.pk}:{task.updated_at.isoformat()}:{int(task.is_outdated())}'
+
+def count_task_rows(hits, misses):
+    '''Adds to the counters of cached task rows, kept in the cache;
+    Counters of all workers add up only with a shared backend, locmem keeps them per process'''
+    for name, count in [('hits', hits), ('misses', misses)]:
+        key = f'todolist:task_row_stats:{name}'
+
+        if count and not cache.add(key, count, timeout=None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                # counter was evicted in between
+                cache.add(key, count, timeout=None)
+
+def cache_is_shared():
+    '''Tells if processes see the same cache, locmem cache belongs to the process that made it'''
+    return not isinstance(caches['default'], LocMemCache)
+
+def get_task_row_stats():
+    '''Returns hits, misses and hit ratio of task rows cache'''
+    hits = cache.get('todolist:task_row_stats:hits', 0)
+    misses = cache.get('todolist:task_row_stats:misses', 0)
+
+    return hits, misses, hits / max(hits + misses, 1)
+
+def reset_task_row_stats():
+    cache.delete_many(['todolist:task_row_stats:hits', 'todolist:task_row_stats:misses'])
+
+def get_task_rows(tasks, render):
+    '''Returns rendered rows of given tasks, taking unchanged ones from cache in a single get_many;
+    render(tasks) is called only for missing tasks and returns their rows'''
+    keys = [task_row_key(task) for task in tasks]
+    rows = cache.get_many(keys)
+
+    missed = [(key, task) for key, task in zip(keys, tasks) if key not in rows]
+
+    if missed:
+        rendered = dict(zip([key for key, task in missed], render([task for key, task in missed])))
+        cache.set_many(rendered, TASK_ROW_TIMEOUT)
+        rows.update(rendered)
+
+    count_task_rows(hits=len(tasks) - len(missed), misses=len(missed))
+
+    return [rows[key] for key in keys]
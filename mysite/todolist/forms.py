@@ -1,12 +1,31 @@
-from django.forms import ModelForm, CharField, DateTimeInput, PasswordInput, TextInput
+from django.forms import (
+    Form, ModelForm, CharField, ChoiceField, DateField, TypedMultipleChoiceField, ModelMultipleChoiceField,
+    DateInput, DateTimeInput, PasswordInput, TextInput, CheckboxSelectMultiple, SelectMultiple,
+)
+from django.urls import reverse_lazy
+from django.db.models import Exists, OuterRef
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
 from .models import Task, TaskGroup
 
+class GroupPicker(SelectMultiple):
+    '''Renders only the selected groups as options, the rest are looked up by the picker script as user types,
+    so the page doesnt grow with the number of groups'''
+
+    def __init__(self, attrs=None):
+        super().__init__({'class': 'group_picker', 'data-lookup-url': reverse_lazy('todolist:api_group_lookup'), **(attrs or {})})
+
+    def optgroups(self, name, value, attrs=None):
+        pks = [pk for pk in value if str(pk).isdigit()]
+        groups = self.choices.queryset.filter(pk__in=pks).order_by('name', 'pk') if pks else []
+
+        options = [self.create_option(name, *self.choices.choice(group), True, index, attrs=attrs) for index, group in enumerate(groups)]
+        return [(None, options, 0)]
+
 class TaskForm(ModelForm):
     # make default deadline value for the form the end of current day
     tomorrow = timezone.now().replace(hour=0, minute=0, second=0) + timedelta(days=1)
@@ -17,16 +36,93 @@ class TaskForm(ModelForm):
         super(TaskForm, self).__init__(*args, **kwargs)
 
         if user:
-            self.fields['group'].queryset = TaskGroup.objects.filter(owner_id=user.id).distinct()
+            self.fields['group'].queryset = TaskGroup.objects.filter(owner_id=user.id)
 
     class Meta:
         model = Task
         fields = ['name', 'description', 'priority', 'deadline', 'group']
+        widgets = {'group': GroupPicker}
+
+class TaskFilterForm(Form):
+    '''Filters and sorts task list by GET parameters; Invalid parameters are ignored'''
+
+    # last field of every ordering is unique, as keyset pagination needs
+    SORTS = {
+        'deadline': ['deadline', 'id'],
+        'priority': ['-priority', 'deadline', 'id'],
+        'created': ['-creation_date', '-id'],
+    }
+
+    group = ModelMultipleChoiceField(queryset=TaskGroup.objects.none(), required=False, widget=GroupPicker)
+    priority = TypedMultipleChoiceField(choices=Task.Priority.choices, coerce=int, required=False, widget=CheckboxSelectMultiple)
+    deadline_after = DateField(required=False, widget=DateInput(attrs={'type':'date'}))
+    deadline_before = DateField(required=False, widget=DateInput(attrs={'type':'date'}))
+    status = ChoiceField(choices=[('', 'All'), ('active', 'Active'), ('outdated', 'Outdated')], required=False)
+    sort = ChoiceField(choices=[('deadline', 'Deadline'), ('priority', 'Priority'), ('created', 'Creation date')], required=False)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super(TaskFilterForm, self).__init__(*args, **kwargs)
+
+        if user:
+            self.fields['group'].queryset = TaskGroup.objects.filter(owner_id=user.id)
+
+    def get_value(self, name):
+        self.is_valid()
+
+        return self.cleaned_data.get(name)
+
+    def get_ordering(self):
+        return self.SORTS[self.get_value('sort') or 'deadline']
+
+    def filter(self, tasks):
+        '''Applies filters to tasks of the queryset, all of them in SQL'''
+        groups = self.get_value('group')
+        priorities = self.get_value('priority')
+        deadline_after = self.get_value('deadline_after')
+        deadline_before = self.get_value('deadline_before')
+
+        if groups:
+            # EXISTS instead of a join, so tasks in several of the groups arent repeated
+            links = Task.group.through.objects.filter(task_id=OuterRef('pk'), taskgroup_id__in=[group.pk for group in groups])
+            tasks = tasks.filter(Exists(links))
+
+        if priorities:
+            tasks = tasks.filter(priority__in=priorities)
+
+        # dates are whole days of the current timezone
+        if deadline_after:
+            tasks = tasks.filter(deadline__gte=timezone.make_aware(datetime.combine(deadline_after, time.min)))
+
+        if deadline_before:
+            tasks = tasks.filter(deadline__lt=timezone.make_aware(datetime.combine(deadline_before + timedelta(days=1), time.min)))
+
+        return tasks.with_status(self.get_value('status'))
+
+    def get_query_string(self):
+        '''Returns filters of the request as query string, for page links'''
+        params = self.data.copy()
+
+        for name in ['after', 'before']:
+            params.pop(name, None)
+
+        return params.urlencode()
+
+class TaskAPIForm(ModelForm):
+    # validates fields of a single task in API batches, groups are checked for the whole batch at once
+    class Meta:
+        model = Task
+        fields = ['name', 'description', 'priority', 'deadline']
+
+class TaskGroupAPIForm(ModelForm):
+    class Meta:
+        model = TaskGroup
+        fields = ['name']
 
 class GroupForm(ModelForm):
     class Meta:
         model = Task
         fields = ['group']
+        widgets = {'group': GroupPicker}
 
 class CreateUserForm(UserCreationForm):
     class Meta:
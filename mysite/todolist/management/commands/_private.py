@@ -0,0 +1,4 @@
+# Shared by benchmark commands
+
+BENCHMARK_USERNAME_PREFIX = 'benchmark_user_'
+BENCHMARK_PASSWORD = 'benchmark'
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from todolist import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds full-text search index of tasks'
+
+    def handle(self, *args, **options):
+        if not search.use_index():
+            raise CommandError('Search index is available on SQLite only.')
+
+        indexed = search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} tasks.'))
@@ -0,0 +1,195 @@
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from guest_user.models import Guest
+
+from todolist import urls
+from todolist.models import Task, TaskGroup, CompletedTask
+
+from ._private import BENCHMARK_USERNAME_PREFIX
+
+
+class Rollback(Exception):
+    pass
+
+
+def get_requests(task, group, ctask):
+    '''Describes request for every url of todolist as (method, url args, data, content type, guest)'''
+    deadline = (timezone.now() + timedelta(days=1)).isoformat()
+    task_data = {'name': 'Benchmark task', 'description': 'Desc', 'priority': Task.Priority.MEDIUM, 'deadline': deadline, 'group': [group.pk]}
+
+    return {
+        'index': ('get', [], None, None, False),
+        'index_more': ('get', [], None, None, False),
+        'async_index': ('get', [], None, None, False),
+        'search': ('get', [], {'q': 'Task 1'}, None, False),
+        'detail': ('get', [task.pk], None, None, False),
+        'async_detail': ('get', [task.pk], None, None, False),
+        'edit': ('get', [task.pk], None, None, False),
+
+        'complete_task': ('post', [task.pk], None, None, False),
+        'delete_task': ('post', [task.pk], None, None, False),
+        'create_task': ('post', [], task_data, None, False),
+        'edit_task': ('post', [task.pk], task_data, None, False),
+
+        'add_group': ('post', [], {'group_name': 'Benchmark group'}, None, False),
+        'delete_group': ('post', [], {'group': [group.pk]}, None, False),
+
+        'login': ('get', [], None, None, True),
+        'register': ('get', [], None, None, True),
+        'logout': ('get', [], None, None, False),
+
+        'dashboard': ('get', [], None, None, False),
+        'async_dashboard': ('get', [], None, None, False),
+        'clean_completed_task': ('get', [ctask.pk], None, None, False),
+        'clean_all_completed_tasks': ('post', [], None, None, False),
+
+        'api_tasks': ('get', [], None, None, False),
+        'api_create_tasks': ('post', [], json.dumps([task_data] * 10), 'application/json', False),
+        'api_update_tasks': ('post', [], json.dumps([{'id': task.pk, 'name': 'Updated'}]), 'application/json', False),
+        'api_complete_tasks': ('post', [], json.dumps([task.pk]), 'application/json', False),
+        'api_delete_tasks': ('post', [], json.dumps([task.pk]), 'application/json', False),
+        'api_groups': ('get', [], None, None, False),
+        'api_group_lookup': ('get', [], {'q': group.name[:3]}, None, False),
+        'api_create_groups': ('post', [], json.dumps([{'name': 'Benchmark group'}] * 10), 'application/json', False),
+        'api_delete_groups': ('post', [], json.dumps([group.pk]), 'application/json', False),
+        'api_completed_tasks': ('get', [], None, None, False),
+        'api_clean_completed_tasks': ('post', [], json.dumps([ctask.pk]), 'application/json', False),
+    }
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Times every url of todolist against benchmark data and writes results to a JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--label', default='', help='Label of the run, e.g. commit hash')
+        parser.add_argument('--only', nargs='*', help='Names of the urls to benchmark')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX).order_by('pk').first()
+
+        if user is None:
+            raise CommandError('No benchmark data, run seed_benchmark_data first.')
+
+        task = Task.objects.filter(owner_id=user.pk).order_by('deadline').first()
+        group = TaskGroup.objects.filter(owner_id=user.pk).first()
+        ctask = CompletedTask.objects.filter(owner_id=user.pk).first()
+
+        if not (task and group and ctask):
+            raise CommandError('Benchmark user should have tasks, groups and completed tasks.')
+
+        requests = get_requests(task, group, ctask)
+        names = [pattern.name for pattern in urls.urlpatterns]
+
+        for name in names:
+            if name not in requests:
+                self.stderr.write(f'No benchmark request for url "{name}", skipping it.')
+
+        guest = Guest.objects.create_guest_user()
+        results = {}
+
+        # test client comes from "testserver" host
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                self.run_all(options['only'] or names, requests, user, guest, options['iterations'], results)
+        finally:
+            guest.delete()
+
+        report = {
+            'label': options['label'],
+            'date': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'data': {
+                'tasks': Task.objects.filter(owner_id=user.pk).count(),
+                'groups': TaskGroup.objects.filter(owner_id=user.pk).count(),
+                'completed_tasks': CompletedTask.objects.filter(owner_id=user.pk).count(),
+            },
+            'results': results,
+        }
+
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Results are written to {options['output']}"))
+
+    def run_all(self, names, requests, user, guest, iterations, results):
+        for name in names:
+            if name not in requests:
+                continue
+
+            result = results[name] = self.benchmark(name, requests[name], user, guest, iterations)
+
+            self.stdout.write(
+                f"{name:30} {result['status']}  p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{result['queries']:4} queries  {result['peak_memory_kb']:8.1f}KB"
+            )
+
+    def benchmark(self, name, request, user, guest, iterations):
+        method, args, data, content_type, as_guest = request
+        url = reverse(f'todolist:{name}', args=args)
+        client = Client()
+
+        durations = []
+        queries = 0
+        peak_memory = 0
+
+        # the last iteration is traced for memory separately, since tracing slows everything down
+        for iteration in range(iterations + 1):
+            traced = iteration == iterations
+
+            # log in again each time, since logout view logs the client out
+            client.force_login(guest if as_guest else user)
+
+            kwargs = {'content_type': content_type} if content_type else {}
+
+            if traced:
+                tracemalloc.start()
+
+            try:
+                # writes are rolled back, so every iteration sees the same data
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as context:
+                        start = time.perf_counter()
+                        response = getattr(client, method)(url, data, **kwargs)
+                        duration = time.perf_counter() - start
+
+                    raise Rollback
+            except Rollback:
+                pass
+
+            if traced:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                durations.append(duration * 1000)
+                queries = len(context.captured_queries)
+
+        return {
+            'method': method.upper(),
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(durations), 3),
+            'p95_ms': round(percentile(durations, 95), 3),
+            'queries': queries,
+            'peak_memory_kb': round(peak_memory / 1024, 1),
+        }
@@ -1,6 +1,14 @@
 import time
+from datetime import timedelta
 
 from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.translation import ngettext
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -9,17 +17,169 @@ from django_apscheduler.jobstores import DjangoJobStore
 from django_apscheduler.models import DjangoJobExecution
 from django_apscheduler import util
 
-from todolist.models import CompletedTask
+from guest_user import settings as guest_user_settings
+from guest_user.functions import get_guest_model
 
+from todolist.models import Task, TaskGroup, CompletedTask, HighWaterMark, LastModified
+from todolist.caching import touch_users
+from todolist.views import delete_tasks, delete_groups
 
-def clean_completed_tasks():
+
+# marks of users that got their digest in a sweep that failed partway
+USER_SWEEP_PREFIX = 'sweep_deadlines:'
+
+
+@util.close_old_connections
+def clean_completed_tasks(batch_size=None, pause=None, time_budget=None):
   """ 
-  Cleans all the instances, since this model just stores info on completed tasks
+  Cleans all the instances, since this model just stores info on completed tasks.
+  Deletes them in primary key batches, each in its own transaction, so writers arent locked out for the whole purge.
+  Whatever is left when the time budget runs out gets cleaned on the next run.
+  """
+
+  batch_size = batch_size or settings.COMPLETED_TASKS_PURGE_BATCH_SIZE
+  pause = settings.COMPLETED_TASKS_PURGE_PAUSE if pause is None else pause
+  time_budget = settings.COMPLETED_TASKS_PURGE_TIME_BUDGET if time_budget is None else time_budget
+
+  # tasks completed during the purge are left for the next run
+  max_pk = CompletedTask.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+  start = time.monotonic()
+  deleted = 0
+
+  while True:
+    rows = list(
+      CompletedTask.objects.filter(pk__lte=max_pk).order_by('pk').values_list('pk', 'owner_id')[:batch_size]
+    )
+
+    if not rows:
+      break
+
+    deleted += CompletedTask.objects.filter(pk__in=[pk for pk, owner_id in rows]).delete()[0]
+    touch_users(*{owner_id for pk, owner_id in rows})
+
+    if time.monotonic() - start >= time_budget:
+      print(f'Cleaning of Completed Tasks - time budget of {time_budget}s is over, the rest is left for the next run.')
+      break
+
+    time.sleep(pause)
+
+  duration = time.monotonic() - start
+  rate = deleted / duration if duration else deleted
+
+  print(f'Cleaning of Completed Tasks - successful. Deleted {deleted} tasks in {duration:.2f}s ({rate:.0f} tasks/s).')
+
+  return deleted
+
+
+@util.close_old_connections
+def delete_expired_guests(max_age=None, batch_size=None):
+  """
+  Deletes guest users that are older than max_age and were inactive since then, together with their data.
+  Activity is taken from last_login, which requests of guests move once a day, and from the last change of their data.
+  Data of each batch of guests is deleted with a few set-based queries instead of cascading user by user.
+  """
+
+  max_age = guest_user_settings.MAX_AGE if max_age is None else max_age
+  batch_size = batch_size or settings.GUEST_PURGE_BATCH_SIZE
+
+  start = time.monotonic()
+  expire_before = timezone.now() - timedelta(seconds=max_age)
+
+  recently_active = LastModified.objects.filter(user_id=OuterRef('user_id'), value__gte=expire_before)
+
+  expired = get_guest_model().objects.filter(
+    Q(user__last_login__isnull=True) | Q(user__last_login__lt=expire_before),
+    ~Exists(recently_active),
+    created_at__lt=expire_before,
+  ).order_by('pk').values_list('user_id', flat=True)
+
+  deleted = 0
+
+  while True:
+    # deleted guests drop out of the query, so every batch is the first one
+    user_ids = list(expired[:batch_size])
+
+    if not user_ids:
+      break
+
+    with transaction.atomic():
+      delete_tasks(Task.objects.filter(owner_id__in=user_ids))
+      delete_groups(TaskGroup.objects.filter(owner_id__in=user_ids))
+      CompletedTask.objects.filter(owner_id__in=user_ids).delete()
+
+      # guest records go away with the users
+      User.objects.filter(pk__in=user_ids).delete()
+
+    deleted += len(user_ids)
+
+  print(f'Delete of expired guests - successful. Deleted {deleted} guests in {time.monotonic() - start:.2f}s.')
+
+  return deleted
+
+
+@util.close_old_connections
+def sweep_deadlines(window=None):
+  """
+  Sends every user one digest of their tasks that passed the deadline since the previous sweep.
+  The previous sweep time is kept as a high-water mark, so each run scans only new deadlines with one indexed range query.
+  On the first run the sweep goes back by window seconds.
+  If sending fails partway, users that got their digest are marked, so the next run doesnt send them the same tasks again.
   """
 
-  CompletedTask.objects.all().delete()
-  print('Cleaning of Completed Tasks - successful.')
-    
+  window = settings.DEADLINE_SWEEP_WINDOW if window is None else window
+
+  now = timezone.now()
+  mark = HighWaterMark.objects.filter(job_id='sweep_deadlines').first()
+  since = mark.value if mark else now - timedelta(seconds=window)
+
+  # users that got their digest in a run that failed later on, with the time it covered
+  sent_until = {
+    int(user_mark.job_id.removeprefix(USER_SWEEP_PREFIX)): user_mark.value
+    for user_mark in HighWaterMark.objects.filter(job_id__startswith=USER_SWEEP_PREFIX)
+  }
+
+  # guests dont have emails
+  tasks = Task.objects.filter(deadline__gt=since, deadline__lte=now).exclude(owner__email='').order_by('deadline').values(
+    'name', 'deadline', 'owner_id', 'owner__username', 'owner__email',
+  )
+
+  digests = {}
+  for task in tasks:
+    if task['deadline'] > sent_until.get(task['owner_id'], since):
+      digests.setdefault((task['owner_id'], task['owner__username'], task['owner__email']), []).append(task)
+
+  sent = []
+
+  try:
+    with get_connection() as mail_connection:
+      for (owner_id, username, email), user_tasks in digests.items():
+        EmailMessage(
+          ngettext('%(count)d of your tasks is overdue', '%(count)d of your tasks are overdue', len(user_tasks)) % {'count': len(user_tasks)},
+          render_to_string('todolist/email/overdue_digest.txt', {'username': username, 'tasks': user_tasks}),
+          to=[email],
+          connection=mail_connection,
+        ).send()
+
+        sent.append(owner_id)
+  except Exception:
+    # the mark stays, so the next run sends the rest of the digests
+    HighWaterMark.objects.bulk_create(
+      [HighWaterMark(job_id=f'{USER_SWEEP_PREFIX}{owner_id}', value=now) for owner_id in sent],
+      update_conflicts=True,
+      unique_fields=['job_id'],
+      update_fields=['value'],
+    )
+    raise
+
+  with transaction.atomic():
+    HighWaterMark.objects.update_or_create(job_id='sweep_deadlines', defaults={'value': now})
+    HighWaterMark.objects.filter(job_id__startswith=USER_SWEEP_PREFIX).delete()
+
+  print(f'Deadline sweep - successful. Sent {len(sent)} digests.')
+
+  return len(sent)
+
 
 @util.close_old_connections
 def delete_old_job_executions(max_age=604_800):
@@ -50,6 +210,28 @@ class Command(BaseCommand):
     print("Added everyday job: 'clean_completed_tasks.")
 
 
+    scheduler.add_job(
+      delete_expired_guests,
+      trigger=CronTrigger(hour="03", minute="00"),  # Every night, away from the completed tasks purge
+      id="delete_expired_guests",
+      max_instances=1,
+      replace_existing=True,
+    )
+
+    print("Added everyday job: 'delete_expired_guests'.")
+
+
+    scheduler.add_job(
+      sweep_deadlines,
+      trigger=CronTrigger(minute="*/15"),  # Every 15 minutes
+      id="sweep_deadlines",
+      max_instances=1,
+      replace_existing=True,
+    )
+
+    print("Added job: 'sweep_deadlines'.")
+
+
     scheduler.add_job(
       delete_old_job_executions,
       trigger=CronTrigger(
@@ -0,0 +1,90 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from todolist.models import Task, TaskGroup, CompletedTask
+
+from ._private import BENCHMARK_USERNAME_PREFIX, BENCHMARK_PASSWORD
+
+
+class Command(BaseCommand):
+    help = 'Generates benchmark users with tasks, groups and completed tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users')
+        parser.add_argument('--tasks', type=int, default=1000, help='Number of tasks per user')
+        parser.add_argument('--groups', type=int, default=20, help='Number of groups per user')
+        parser.add_argument('--fan-out', type=int, default=3, help='Max number of groups per task')
+        parser.add_argument('--completed', type=int, default=100, help='Number of completed tasks per user')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator, for repeatable data')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        now = timezone.now()
+
+        with transaction.atomic():
+            # previous benchmark data goes away with its users
+            User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX).delete()
+
+            # hashing is slow, so all of the users share one password hash
+            password = make_password(BENCHMARK_PASSWORD)
+            users = User.objects.bulk_create(
+                [User(username=f'{BENCHMARK_USERNAME_PREFIX}{i}', password=password) for i in range(options['users'])]
+            )
+
+            groups = TaskGroup.objects.bulk_create(
+                [TaskGroup(name=f'Group {i}', owner_id=user.pk) for user in users for i in range(options['groups'])],
+                batch_size=batch_size,
+            )
+
+            tasks = Task.objects.bulk_create(
+                [
+                    Task(
+                        name=f'Task {i}',
+                        description=f'Description of task {i}',
+                        priority=rng.choice(Task.Priority.values),
+                        deadline=now + timedelta(minutes=rng.randint(-30 * 24 * 60, 60 * 24 * 60)),
+                        owner_id=user.pk,
+                    )
+                    for user in users for i in range(options['tasks'])
+                ],
+                batch_size=batch_size,
+            )
+
+            groups_by_owner = {}
+            for group in groups:
+                groups_by_owner.setdefault(group.owner_id, []).append(group.pk)
+
+            Link = Task.group.through
+            links = []
+
+            for task in tasks:
+                owner_groups = groups_by_owner.get(task.owner_id, [])
+                fan_out = rng.randint(0, min(options['fan_out'], len(owner_groups)))
+
+                links.extend(Link(task_id=task.pk, taskgroup_id=group_id) for group_id in rng.sample(owner_groups, fan_out))
+
+            Link.objects.bulk_create(links, batch_size=batch_size)
+
+            ctasks = CompletedTask.objects.bulk_create(
+                [CompletedTask(name=f'Completed task {i}', owner_id=user.pk) for user in users for i in range(options['completed'])],
+                batch_size=batch_size,
+            )
+
+            # spread completion dates over the last week
+            for ctask in ctasks:
+                ctask.complete_date = now - timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+
+            CompletedTask.objects.bulk_update(ctasks, ['complete_date'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {len(tasks)} tasks, {len(groups)} groups, '
+            f'{len(links)} task-group links and {len(ctasks)} completed tasks.'
+        ))
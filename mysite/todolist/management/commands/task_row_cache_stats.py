@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from todolist import caching
+
+
+class Command(BaseCommand):
+    help = 'Shows hit ratio of the cache of rendered task rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args, **options):
+        if not caching.cache_is_shared():
+            raise CommandError('Counters are kept in the cache of each process, set a shared cache backend in CACHES to read them.')
+
+        hits, misses, ratio = caching.get_task_row_stats()
+
+        self.stdout.write(f'Task rows: {hits} hits, {misses} misses, hit ratio {ratio:.1%}')
+
+        if options['reset']:
+            caching.reset_task_row_stats()
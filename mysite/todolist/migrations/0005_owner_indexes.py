@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist', '0004_alter_task_group_completedtask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='completedtask',
+            index=models.Index(fields=['owner', 'complete_date'], name='ctask_owner_complete_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'deadline'], name='task_owner_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskgroup',
+            index=models.Index(fields=['owner', 'name'], name='taskgroup_owner_name_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+
+# Contentless FTS5 index of tasks, kept in sync by triggers.
+# Owner is indexed as a "u<owner_id>" token, so owner-scoped searches intersect posting lists instead of filtering matches.
+# Prefix indexes make short prefix terms as cheap as whole words.
+
+CREATE_INDEX = [
+    '''
+    CREATE VIRTUAL TABLE todolist_task_fts USING fts5(name, description, owner, content='', tokenize='unicode61', prefix='2 3')
+    ''',
+    '''
+    CREATE TRIGGER todolist_task_fts_insert AFTER INSERT ON todolist_task BEGIN
+        INSERT INTO todolist_task_fts (rowid, name, description, owner)
+        VALUES (new.id, new.name, new.description, 'u' || new.owner_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER todolist_task_fts_delete AFTER DELETE ON todolist_task BEGIN
+        INSERT INTO todolist_task_fts (todolist_task_fts, rowid, name, description, owner)
+        VALUES ('delete', old.id, old.name, old.description, 'u' || old.owner_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER todolist_task_fts_update AFTER UPDATE OF name, description, owner_id ON todolist_task BEGIN
+        INSERT INTO todolist_task_fts (todolist_task_fts, rowid, name, description, owner)
+        VALUES ('delete', old.id, old.name, old.description, 'u' || old.owner_id);
+        INSERT INTO todolist_task_fts (rowid, name, description, owner)
+        VALUES (new.id, new.name, new.description, 'u' || new.owner_id);
+    END
+    ''',
+    '''
+    INSERT INTO todolist_task_fts (rowid, name, description, owner)
+    SELECT id, name, description, 'u' || owner_id FROM todolist_task
+    ''',
+]
+
+DROP_INDEX = [
+    'DROP TRIGGER IF EXISTS todolist_task_fts_insert',
+    'DROP TRIGGER IF EXISTS todolist_task_fts_delete',
+    'DROP TRIGGER IF EXISTS todolist_task_fts_update',
+    'DROP TABLE IF EXISTS todolist_task_fts',
+]
+
+
+def run_on_sqlite(statements):
+    '''Other databases search with plain lookups, see todolist.search'''
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todolist', '0006_deadline_sweep'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_INDEX), run_on_sqlite(DROP_INDEX)),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # first of the three steps of the priority conversion; schema steps are atomic,
+    # only the copy of the data in between runs outside of a transaction
+
+    dependencies = [
+        ('todolist', '0008_task_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_priority_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_value',
+            field=models.SmallIntegerField(null=True),
+        ),
+        # nullable, so the field can be brought back empty when the conversion is reversed
+        migrations.AlterField(
+            model_name='task',
+            name='priority',
+            field=models.CharField(max_length=10, null=True, choices=[('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High'), ('Critical', 'Critical')]),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, transaction
+from django.db.models import Case, Max, Value, When
+
+
+# Labels and values of Task.Priority at the time of this migration
+PRIORITIES = [(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Critical')]
+
+# rows are converted by ranges of primary keys, each range in its own transaction
+BATCH_SIZE = 10000
+
+
+def convert_in_batches(apps, schema_editor, source, target, mapping, default):
+    Task = apps.get_model('todolist', 'Task')
+    database = schema_editor.connection.alias
+
+    converted = Case(
+        *[When(**{source: old}, then=Value(new)) for old, new in mapping],
+        default=Value(default),
+    )
+
+    max_pk = Task.objects.using(database).aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+    for start in range(0, max_pk, BATCH_SIZE):
+        with transaction.atomic(using=database):
+            Task.objects.using(database).filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(**{target: converted})
+
+def labels_to_values(apps, schema_editor):
+    mapping = [(label, value) for value, label in PRIORITIES]
+    convert_in_batches(apps, schema_editor, 'priority', 'priority_value', mapping, default=2)
+
+def values_to_labels(apps, schema_editor):
+    convert_in_batches(apps, schema_editor, 'priority_value', 'priority', PRIORITIES, default='Medium')
+
+
+class Migration(migrations.Migration):
+    # batches are committed one by one instead of holding a lock on the table for the whole copy;
+    # both fields are there until the next migration, so a copy that failed partway is just run again
+    atomic = False
+
+    dependencies = [
+        ('todolist', '0009_add_priority_value'),
+    ]
+
+    operations = [
+        migrations.RunPython(labels_to_values, values_to_labels),
+    ]
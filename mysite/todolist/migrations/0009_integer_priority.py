@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # last step of the priority conversion, values copied by the previous migration replace the labels
+
+    dependencies = [
+        ('todolist', '0009_copy_priority_values'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='task',
+            name='priority',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='priority_value',
+            new_name='priority',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='priority',
+            field=models.SmallIntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Critical')]),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', '-priority', 'deadline'], name='task_owner_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('todolist', '0010_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LastModified',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 
 class OwnerMixin(models.Model):
     def save(self, *args, **kwargs):
+        # fallback for objects made without owner, e.g. in the shell; views always set owner_id
         if self.pk is None and self.owner_id is None:
             self.owner = get_user_model().objects.first()
         super().save(*args, **kwargs)
@@ -24,43 +25,129 @@ class OwnerMixin(models.Model):
 class TaskGroup(OwnerMixin):
     name = models.CharField(max_length=50) 
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'name'], name='taskgroup_owner_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+class TaskQuerySet(models.QuerySet):
+    def with_outdated(self):
+        '''Annotates tasks with outdated flag computed by the database, for filtering and ordering by it'''
+        return self.annotate(
+            outdated=models.ExpressionWrapper(models.Q(deadline__lte=timezone.now()), output_field=models.BooleanField())
+        )
+
+    def outdated(self):
+        return self.filter(deadline__lte=timezone.now())
+
+    def active(self):
+        return self.filter(deadline__gt=timezone.now())
+
+    def touch(self):
+        '''Marks tasks as changed, for paths that dont go through save(), e.g. update() or changes of groups'''
+        return self.update(updated_at=timezone.now())
+
+    def with_status(self, status):
+        '''Filters tasks by "outdated" or "active" status, other values leave tasks as they are'''
+        if status == 'outdated':
+            return self.outdated()
+
+        if status == 'active':
+            return self.active()
+
+        return self
+
 class Task(OwnerMixin):
     name = models.CharField(max_length=50)
     description = models.CharField(max_length=255, blank=True)
 
-    PRIORITYCHOICES = [
-       ('Low', 'Low'),
-       ('Medium', 'Medium'),
-       ('High', 'High'),
-       ('Critical', 'Critical'),
-   ]
+    class Priority(models.IntegerChoices):
+        # values are ranks, so tasks are sorted by priority as it is
+        LOW = 1, 'Low'
+        MEDIUM = 2, 'Medium'
+        HIGH = 3, 'High'
+        CRITICAL = 4, 'Critical'
     
-    priority = models.CharField(max_length=10, choices=PRIORITYCHOICES)
+    priority = models.SmallIntegerField(choices=Priority.choices)
 
     creation_date = models.DateTimeField(auto_now_add=True)
     deadline = models.DateTimeField()
+    # version of the task for caches of its rendered row
+    updated_at = models.DateTimeField(auto_now=True)
 
     group = models.ManyToManyField(TaskGroup, blank=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'deadline'], name='task_owner_deadline_idx'),
+            # for the deadline sweep over all owners
+            models.Index(fields=['deadline'], name='task_deadline_idx'),
+            # for filters and sorts of the task list
+            models.Index(fields=['owner', '-priority', 'deadline'], name='task_owner_priority_idx'),
+            models.Index(fields=['owner', 'creation_date'], name='task_owner_creation_date_idx'),
+        ]
+
     @admin.display(
         boolean=True,
-        ordering="deadline",
+        ordering="outdated",
         description="Is outdated",
     )
     def is_outdated(self):
+        # tasks from with_outdated() already know it
+        if hasattr(self, 'outdated'):
+            return self.outdated
+
         return self.deadline <= timezone.now()
 
     def __str__(self):
         return self.name
 
+def touch_linked_tasks(sender, instance, action, reverse, pk_set, **kwargs):
+    '''Marks tasks whose groups were changed through the related managers, e.g. task.group.set()'''
+    if not reverse:
+        if action in ['post_add', 'post_remove', 'post_clear']:
+            Task.objects.filter(pk=instance.pk).touch()
+
+    elif action in ['post_add', 'post_remove']:
+        Task.objects.filter(pk__in=pk_set).touch()
+
+    # links of the group are gone after the clear
+    elif action == 'pre_clear':
+        Task.objects.filter(group=instance).touch()
+
 class CompletedTask(OwnerMixin):
     '''Stores info about the task that is completed already'''
 
     name = models.CharField(max_length=50)
     complete_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'complete_date'], name='ctask_owner_complete_date_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class HighWaterMark(models.Model):
+    '''Stores how far a scheduled job has got, so its next run starts from there'''
+
+    job_id = models.CharField(max_length=255, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.job_id}: {self.value}'
+
+class LastModified(models.Model):
+    '''Time of the last change of user`s data, pages of the user are answered with 304 until it moves'''
+
+    user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE, primary_key=True, related_name='+')
+    value = models.DateTimeField()
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f'{self.user_id}: {self.value}'
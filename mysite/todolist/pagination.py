@@ -0,0 +1,141 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_value(value):
+    '''Keeps full precision of dates, since cursor values are compared for equality'''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    raise TypeError(f'Cant encode {type(value).__name__} in the cursor')
+
+
+class KeysetPage:
+    '''Page of objects with cursors pointing to its neighbours'''
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    '''Paginates queryset by the values of its ordering fields instead of OFFSET,
+    so every page costs the same as the first one.
+    Last field of the ordering must be unique (e.g. id) to keep pages stable.'''
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+
+    def encode_cursor(self, obj):
+        # objects may come from values() as well
+        get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+        values = [get(field.lstrip('-')) for field in self.ordering]
+        data = json.dumps(values, default=encode_value)
+
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise InvalidCursor('Cursor is malformed')
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor('Cursor doesnt match the ordering')
+
+        # cursors come from the client, so values are converted by their fields before they get to the query
+        try:
+            return [self.to_python(field, value) for field, value in zip(self.ordering, values)]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor('Cursor values dont match the ordering')
+
+    def to_python(self, field, value):
+        if value is None:
+            raise ValueError('Ordering fields arent nullable')
+
+        model_field = self.queryset.model._meta.get_field(field.lstrip('-'))
+        return model_field.get_prep_value(model_field.to_python(value))
+
+    def get_filter(self, cursor, forward=True):
+        '''Builds (a > x) OR (a = x AND b > y) ... condition for rows beyond the cursor'''
+        values = self.decode_cursor(cursor)
+        condition = Q()
+        equal = Q()
+
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            lookup = 'gt' if descending != forward else 'lt'
+
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        return condition
+
+    def get_page_queryset(self, after=None, before=None):
+        if before:
+            reversed_ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in self.ordering]
+            queryset = self.queryset.filter(self.get_filter(before, forward=False)).order_by(*reversed_ordering)
+        else:
+            queryset = self.queryset.order_by(*self.ordering)
+
+            if after:
+                queryset = queryset.filter(self.get_filter(after))
+
+        # one extra object tells if there is something beyond this page
+        return queryset[:self.per_page + 1]
+
+    def make_page(self, object_list, after=None, before=None):
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+
+        if before:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(after)
+
+        if not object_list:
+            return KeysetPage(object_list)
+
+        next_cursor = self.encode_cursor(object_list[-1]) if has_next else None
+        previous_cursor = self.encode_cursor(object_list[0]) if has_previous else None
+
+        return KeysetPage(object_list, next_cursor, previous_cursor)
+
+    def get_page(self, after=None, before=None):
+        object_list = list(self.get_page_queryset(after, before))
+
+        return self.make_page(object_list, after, before)
+
+    async def aget_page(self, after=None, before=None):
+        object_list = [obj async for obj in self.get_page_queryset(after, before)]
+
+        return self.make_page(object_list, after, before)
@@ -0,0 +1,85 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+MIDDLEWARE = 'todolist.querybudget.QueryBudgetMiddleware'
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    '''Declares max number of queries a request to the view can make;
+    Works for both function views and view classes'''
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+
+    return decorator
+
+def get_query_budget(view):
+    '''Returns budget declared for the view, None if there is no budget'''
+    budget = getattr(view, 'query_budget', None)
+
+    # views made by as_view() keep their class
+    if budget is None and hasattr(view, 'view_class'):
+        budget = getattr(view.view_class, 'query_budget', None)
+
+    return budget
+
+
+class QueryCounter:
+    '''Execute wrapper that keeps sql of every query made through it'''
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+class QueryBudgetMiddleware:
+    '''Development middleware that checks requests against budgets of their views;
+    Logs a warning or raises QueryBudgetExceeded depending on QUERY_BUDGET_MODE setting'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # anonymous requests may create a guest user on the way, these arent covered by budgets
+        if SESSION_KEY not in request.session:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        budget = get_query_budget(match.func) if match else None
+
+        if budget is not None and len(counter) > budget:
+            self.exceeded(request, match.view_name, budget, counter.queries)
+
+        return response
+
+    def exceeded(self, request, view_name, budget, queries):
+        message = (
+            f'{request.method} {request.path} ({view_name}) made {len(queries)} queries, its budget is {budget}:\n'
+            + '\n'.join(queries)
+        )
+
+        if getattr(settings, 'QUERY_BUDGET_MODE', 'log') == 'raise':
+            raise QueryBudgetExceeded(message)
+
+        logger.warning(message)
@@ -0,0 +1,125 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Task
+
+
+# FTS5 index is created by migration 0007_task_search
+SEARCH_TABLE = 'todolist_task_fts'
+
+# name matches count more than description ones, owner token doesnt count at all
+SEARCH_WEIGHTS = (10.0, 1.0, 0.0)
+
+SEARCH_LIMIT = 50
+
+# SQLite drops triggers with the table, and migrations rebuild the task table to alter it, see ensure_index
+TRIGGERS = {
+    'todolist_task_fts_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS todolist_task_fts_insert AFTER INSERT ON todolist_task BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, name, description, owner)
+            VALUES (new.id, new.name, new.description, 'u' || new.owner_id);
+        END
+    ''',
+    'todolist_task_fts_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS todolist_task_fts_delete AFTER DELETE ON todolist_task BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name, description, owner)
+            VALUES ('delete', old.id, old.name, old.description, 'u' || old.owner_id);
+        END
+    ''',
+    'todolist_task_fts_update': f'''
+        CREATE TRIGGER IF NOT EXISTS todolist_task_fts_update AFTER UPDATE OF name, description, owner_id ON todolist_task BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name, description, owner)
+            VALUES ('delete', old.id, old.name, old.description, 'u' || old.owner_id);
+            INSERT INTO {SEARCH_TABLE} (rowid, name, description, owner)
+            VALUES (new.id, new.name, new.description, 'u' || new.owner_id);
+        END
+    ''',
+}
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query)
+
+def make_match(terms, owner_id=None):
+    '''Makes FTS5 query where every term is matched by prefix in name or description;
+    Terms are quoted, so the query syntax cant be injected'''
+    match = '{name description} : (' + ' '.join(f'"{term}"*' for term in terms) + ')'
+
+    if owner_id is not None:
+        match = f'owner : "u{owner_id}" AND {match}'
+
+    return match
+
+def use_index():
+    return connection.vendor == 'sqlite'
+
+def search_tasks(user_id, query, limit=SEARCH_LIMIT):
+    '''Returns tasks of the user that match every term of the query by prefix, best matches first'''
+    terms = get_terms(query)
+
+    if not terms:
+        return Task.objects.none()
+
+    if not use_index():
+        tasks = Task.objects.filter(owner_id=user_id)
+
+        for term in terms:
+            tasks = tasks.filter(Q(name__icontains=term) | Q(description__icontains=term))
+
+        return tasks.order_by('deadline')[:limit]
+
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+
+    return Task.objects.raw(
+        f'''SELECT todolist_task.* FROM {SEARCH_TABLE}
+        JOIN todolist_task ON todolist_task.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH %s AND todolist_task.owner_id = %s
+        ORDER BY bm25({SEARCH_TABLE}, {weights})
+        LIMIT %s''',
+        [make_match(terms, owner_id=user_id), user_id, limit],
+    )
+
+def filter_tasks(tasks, query):
+    '''Filters tasks of any owners by the query, for the admin search'''
+    terms = get_terms(query)
+
+    if not terms or not use_index():
+        return None
+
+    return tasks.filter(pk__in=RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [make_match(terms)]))
+
+def rebuild_index(using='default'):
+    '''Fills the index from scratch, returns the number of indexed tasks'''
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('delete-all')")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, description, owner) "
+            "SELECT id, name, description, 'u' || owner_id FROM todolist_task"
+        )
+
+        return cursor.rowcount
+
+def ensure_index(using='default', **kwargs):
+    '''Recreates triggers of the index that are missing, and rebuilds the index since changes could be missed without them;
+    Connected to post_migrate'''
+    if connections[using].vendor != 'sqlite':
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE name = %s OR tbl_name = 'todolist_task'", [SEARCH_TABLE])
+        existing = {name for type, name in cursor.fetchall()}
+
+        # index isnt migrated yet
+        if SEARCH_TABLE not in existing:
+            return
+
+        missing = [sql for name, sql in TRIGGERS.items() if name not in existing]
+
+        for sql in missing:
+            cursor.execute(sql)
+
+    if missing:
+        rebuild_index(using)
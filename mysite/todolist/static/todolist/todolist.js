@@ -0,0 +1,116 @@
+// Scripts of every page, loaded once and cached by the browser
+
+function openForm(element) {
+    var form = document.getElementById(element);
+
+    if (form.style.display === "block") {
+        form.style.display = "none";
+    }
+    else {
+        form.style.display = "block";
+    }
+}
+
+// pop-up windows are moved by dragging them by anything but their fields
+function makeDraggable(element) {
+    var startX, startY, left, top;
+
+    function move(event) {
+        element.style.left = left + event.clientX - startX + 'px';
+        element.style.top = top + event.clientY - startY + 'px';
+    }
+
+    element.addEventListener('pointerdown', event => {
+        if (event.target.closest('input, select, textarea, button, a, li')) {
+            return;
+        }
+
+        startX = event.clientX;
+        startY = event.clientY;
+        left = element.offsetLeft;
+        top = element.offsetTop;
+
+        element.setPointerCapture(event.pointerId);
+        element.addEventListener('pointermove', move);
+    });
+
+    element.addEventListener('pointerup', () => element.removeEventListener('pointermove', move));
+}
+
+// groups are looked up by their names instead of being listed on the page
+function initGroupPicker(select) {
+    var container = document.createElement('div');
+    var search = document.createElement('input');
+    var results = document.createElement('ul');
+    var next = null;
+    var loading = false;
+    var timer;
+
+    container.className = 'group_picker_container';
+    search.type = 'search';
+    search.placeholder = 'Find group';
+    results.className = 'group_picker_results';
+
+    select.before(container);
+    container.append(search, results, select);
+
+    function load(after) {
+        var url = select.dataset.lookupUrl + '?q=' + encodeURIComponent(search.value);
+
+        if (after) {
+            url += '&after=' + after;
+        }
+
+        loading = true;
+
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                if (!after) {
+                    results.replaceChildren();
+                }
+
+                data.groups.forEach(group => {
+                    var item = document.createElement('li');
+                    item.textContent = group.name;
+                    item.onclick = () => pick(group);
+                    results.append(item);
+                });
+
+                next = data.next;
+                loading = false;
+            });
+    }
+
+    function pick(group) {
+        var option = select.querySelector('option[value="' + group.id + '"]');
+
+        if (!option) {
+            option = new Option(group.name, group.id);
+            select.append(option);
+        }
+
+        option.selected = true;
+    }
+
+    search.addEventListener('focus', () => {
+        if (!results.children.length) {
+            load();
+        }
+    });
+
+    search.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => load(), 200);
+    });
+
+    // next page is loaded when the list is scrolled to its end
+    results.addEventListener('scroll', () => {
+        if (next && !loading && results.scrollTop + results.clientHeight >= results.scrollHeight - 10) {
+            load(next);
+        }
+    });
+}
+
+document.querySelectorAll('[data-draggable]').forEach(makeDraggable);
+document.querySelectorAll('select.group_picker').forEach(initGroupPicker);
@@ -0,0 +1,62 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    # brotli copies are made only when the package is installed, gzip ones always are
+    brotli = None
+
+
+# text assets are worth compressing, images are compressed already
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.svg')
+
+
+def gzip_compress(content):
+    # fixed mtime, so the same file gives the same archive on every collectstatic
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+def brotli_compress(content):
+    return brotli.compress(content)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    '''Stores static files under names with hash of their content, next to gzip and brotli copies of them;
+    The web server sends the copy the browser accepts and caches all of them forever, as changed files get new names'''
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = []
+
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if isinstance(hashed_name, str):
+                hashed_names.append(hashed_name)
+
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for hashed_name in hashed_names:
+            if hashed_name.endswith(COMPRESSED_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        with self.open(name) as file:
+            content = file.read()
+
+        compressors = [('.gz', gzip_compress)]
+
+        if brotli is not None:
+            compressors.append(('.br', brotli_compress))
+
+        for extension, compress in compressors:
+            compressed = compress(content)
+
+            # small files can get bigger, the server sends the original then
+            if len(compressed) < len(content):
+                if self.exists(name + extension):
+                    self.delete(name + extension)
+
+                self._save(name + extension, ContentFile(compressed))
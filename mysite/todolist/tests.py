@@ -1,6 +1,22 @@
+import base64
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
 from datetime import timedelta
+from unittest import mock, skipUnless
 
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db import connection
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command, CommandError
+from django.core.cache import cache
 from django.test import TestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, modify_settings, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from django.forms.models import model_to_dict
@@ -8,12 +24,29 @@ from django.forms.models import model_to_dict
 from django.contrib.sessions.backends.db import SessionStore
 from django.contrib.auth.models import User
 
-from .models import Task, TaskGroup, CompletedTask
+from .models import Task, TaskGroup, CompletedTask, HighWaterMark, LastModified
 from guest_user.models import Guest
 
-from .views import LoginView, LogOutView
+from .views import LoginView, LogOutView, IndexView, convert_guest_data, complete_tasks, delete_tasks
+from .querybudget import MIDDLEWARE as QUERY_BUDGET_MIDDLEWARE, QueryBudgetExceeded, get_query_budget
+from . import urls
+from .search import ensure_index
+from .timing import ServerTimingMiddleware
+from .caching import get_task_row_stats, touch_users
+from .management.commands.runapscheduler import clean_completed_tasks, delete_expired_guests, sweep_deadlines
+
+class QueryBudgetMixin:
+    '''Test case mixin that fails the test when any request made by it exceeds the query budget of its view'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        for overrider in (modify_settings(MIDDLEWARE={'append': QUERY_BUDGET_MIDDLEWARE}), override_settings(QUERY_BUDGET_MODE='raise')):
+            overrider.enable()
+            cls.addClassCleanup(overrider.disable)
 
-def create_task(task_name, desc='desc', pr='Medium', days=5, groups=None, user=None):
+def create_task(task_name, desc='desc', pr=Task.Priority.MEDIUM, days=5, groups=None, user=None):
     '''Creates a task with deadline offset to now;
     Negative for task with deadline in the past; Positive for task with deadline in the future.'''
     time = timezone.now() + timedelta(days=days)
@@ -49,7 +82,7 @@ def create_group(group_name, user=None):
     return group
 
 
-class IndexTaskViewUserTests(TestCase):
+class IndexTaskViewUserTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -149,8 +182,122 @@ class IndexTaskViewUserTests(TestCase):
 
         self.assertQuerySetEqual(response.context['task_list'], [])
 
+    def test_only_first_three_groups_displayed(self):
+        '''Testing if only first 3 groups of the task are displayed'''
+        self.login_test_user()
+
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(1, 5)]
+        create_task(task_name='Task', groups=groups, user=self.user)
+
+        response = self.c.get(reverse('todolist:index'))
+        task = response.context['task_list'][0]
+
+        self.assertEqual(task.group_names, 'TestGroup 1 - TestGroup 2 - TestGroup 3')
+
+    def test_query_count_doesnt_depend_on_task_count(self):
+        '''Testing if index is rendered with the same number of queries for any number of tasks'''
+        self.login_test_user()
+
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(1, 5)]
+        create_task(task_name='Task', groups=groups, user=self.user)
+
+        with self.assertNumQueries(5):
+            self.c.get(reverse('todolist:index'))
+
+        for i in range(20):
+            create_task(task_name=f'Task {i}', groups=groups, user=self.user)
+
+        with self.assertNumQueries(5):
+            self.c.get(reverse('todolist:index'))
+
+
+@mock.patch.object(IndexView, 'paginate_by', 2)
+class IndexPaginationTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.username = 'test_user'
+        self.password = '12345'
+        self.user = User.objects.create_user(username=self.username, password=self.password)
+        self.c.login(username=self.username, password=self.password)
+
+        # tasks with equal deadlines, to test that id breaks the tie
+        self.tasks = [create_task(task_name=f'Task {i}', days=i // 2 + 1, user=self.user) for i in range(5)]
+
+    def test_first_page(self):
+        '''Testing if first page contains tasks with the closest deadlines'''
+        response = self.c.get(reverse('todolist:index'))
+
+        self.assertQuerySetEqual(response.context['task_list'], self.tasks[:2])
+        self.assertTrue(response.context['page_obj'].has_next())
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_walk_through_pages(self):
+        '''Testing if following next cursors gives every task exactly once'''
+        seen = []
+        params = {}
+
+        while True:
+            response = self.c.get(reverse('todolist:index'), params)
+            page = response.context['page_obj']
+            seen.extend(response.context['task_list'])
+
+            if not page.has_next():
+                break
+
+            params = {'after': page.next_cursor}
 
-class DetailViewTests(TestCase):
+        self.assertEqual(seen, self.tasks)
+
+    def test_previous_page(self):
+        '''Testing if previous cursor leads back to the same page'''
+        response = self.c.get(reverse('todolist:index'))
+        first_page = list(response.context['task_list'])
+
+        response = self.c.get(reverse('todolist:index'), {'after': response.context['page_obj'].next_cursor})
+        response = self.c.get(reverse('todolist:index'), {'before': response.context['page_obj'].previous_cursor})
+
+        self.assertEqual(list(response.context['task_list']), first_page)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_load_more(self):
+        '''Testing if load more endpoint renders only rows of the next page'''
+        response = self.c.get(reverse('todolist:index'))
+        cursor = response.context['page_obj'].next_cursor
+
+        response = self.c.get(reverse('todolist:index_more'), {'after': cursor})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertQuerySetEqual(response.context['task_list'], self.tasks[2:4])
+        self.assertNotContains(response, 'Create new task')
+
+    def test_404_for_invalid_cursor(self):
+        '''Testing if 404 is given for malformed cursor'''
+        response = self.c.get(reverse('todolist:index'), {'after': 'abc'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_404_for_tampered_cursor(self):
+        '''Testing if 404 is given for cursor with values that dont fit fields of the ordering'''
+        for values in [['2020-01-01T00:00:00+00:00', 'abc'], [1, 2], [None, 1], [[], {}]]:
+            with self.subTest(values=values):
+                cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+                response = self.c.get(reverse('todolist:index'), {'after': cursor})
+
+                self.assertEqual(response.status_code, 404)
+
+    def test_deep_page_query_count(self):
+        '''Testing if the last page costs as many queries as the first one'''
+        response = self.c.get(reverse('todolist:index'))
+        cursor = response.context['page_obj'].next_cursor
+        response = self.c.get(reverse('todolist:index'), {'after': cursor})
+        cursor = response.context['page_obj'].next_cursor
+
+        with self.assertNumQueries(5):
+            self.c.get(reverse('todolist:index'), {'after': cursor})
+
+
+class DetailViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -184,6 +331,16 @@ class DetailViewTests(TestCase):
 
         self.assertContains(response, f'{group1.name} - {group2.name}')
 
+    def test_query_count(self):
+        '''Testing if detail page is rendered with fixed number of queries'''
+        self.login_test_user()
+
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(1, 5)]
+        task = create_task(task_name='Task', groups=groups, user=self.user)
+
+        with self.assertNumQueries(5):
+            self.c.get(reverse('todolist:detail', args=[task.pk]))
+
     def test_404_for_nonexistent_task(self):
         '''Testing if trying to access nonexistent task gives 404'''
         response = self.c.get(reverse('todolist:detail', args=[1]))
@@ -218,7 +375,7 @@ class DetailViewTests(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
-class CompleteTaskViewTests(TestCase):
+class CompleteTaskViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -255,7 +412,7 @@ class CompleteTaskViewTests(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
-class DeleteTaskViewTests(TestCase):
+class DeleteTaskViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -303,7 +460,62 @@ class DeleteTaskViewTests(TestCase):
         self.assertQuerySetEqual(response.context['task_list'], [])
 
 
-class EditPageTests(TestCase):
+class AdminCompleteTaskActionTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.username = 'admin'
+        self.password = '12345'
+        self.admin = User.objects.create_superuser(username=self.username, password=self.password)
+
+    def test_complete_task_action(self):
+        '''Testing if admin action makes completed task records and deletes selected tasks'''
+        self.c.login(username=self.username, password=self.password)
+
+        group = create_group('TestGroup', user=self.admin)
+        tasks = [create_task(task_name=f'Task {i}', groups=[group], user=self.admin) for i in range(3)]
+        other_task = create_task(task_name='Other task', user=self.admin)
+
+        response = self.c.post(
+            reverse('admin:todolist_task_changelist'), 
+            {'action': 'complete_task', '_selected_action': [task.pk for task in tasks]},
+            follow=True,
+        )
+
+        self.assertContains(response, 'Completed 3 tasks')
+        self.assertQuerySetEqual(Task.objects.all(), [other_task])
+        self.assertEqual(
+            sorted(CompletedTask.objects.values_list('name', 'owner_id')), 
+            [(f'Task {i}', self.admin.id) for i in range(3)],
+        )
+        self.assertFalse(Task.group.through.objects.exists())
+
+    def test_complete_tasks_in_batches(self):
+        '''Testing if batches together complete every task'''
+        for i in range(5):
+            create_task(task_name=f'Task {i}', user=self.admin)
+
+        completed = complete_tasks(Task.objects.all(), batch_size=2)
+
+        self.assertEqual(completed, 5)
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(CompletedTask.objects.count(), 5)
+
+    def test_batch_deleted_in_one_statement(self):
+        '''Testing if each batch deletes its tasks and their links with one statement each'''
+        group = create_group('TestGroup', user=self.admin)
+        Task.objects.bulk_create([Task(name=f'Task {i}', priority=Task.Priority.LOW, deadline=timezone.now(), owner_id=self.admin.id) for i in range(500)])
+        Task.group.through.objects.bulk_create([Task.group.through(task_id=pk, taskgroup_id=group.pk) for pk in Task.objects.values_list('pk', flat=True)])
+
+        with CaptureQueriesContext(connection) as queries:
+            complete_tasks(Task.objects.all())
+
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 2)
+        self.assertFalse(Task.objects.exists())
+
+
+class EditPageTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -357,7 +569,7 @@ class EditPageTests(TestCase):
             self.assertEqual(task_form[field], task_dict[field])
 
 
-class EditTaskViewTests(TestCase):
+class EditTaskViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -404,7 +616,7 @@ class EditTaskViewTests(TestCase):
         updated_task_context = {
             'name': 'Updated task', 
             'description': 'Updated desc', 
-            'priority': 'Critical', 
+            'priority': Task.Priority.CRITICAL, 
             'deadline': timezone.now(),
             'group': [group2.pk, group3.pk],
             # pk is for validation in the view
@@ -429,8 +641,42 @@ class EditTaskViewTests(TestCase):
         response = self.c.get(reverse('todolist:index'))
         self.assertQuerySetEqual(response.context['task_list'], [updated_task])
 
+    def test_task_edit_writes(self):
+        '''Testing if editing of the task is one update of the task and bulk writes to the through table'''
+        self.login_test_user()
+
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(3)]
+        task = create_task(task_name='Task', groups=groups[:1], user=self.user)
+
+        context = {'name': 'Updated task', 'description': '', 'priority': Task.Priority.HIGH, 
+                   'deadline': timezone.now(), 'group': [group.pk for group in groups]}
+
+        with CaptureQueriesContext(connection) as queries:
+            self.c.post(reverse('todolist:edit_task', args=[task.pk]), context)
+
+        writes = [query['sql'].split()[0] for query in queries
+                  if not query['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE')) and 'todolist_lastmodified' not in query['sql']]
+        self.assertEqual(writes, ['UPDATE', 'DELETE', 'INSERT'])
+        self.assertQuerySetEqual(Task.objects.get(pk=task.pk).group.order_by('pk'), groups)
+
+    def test_other_user_groups_not_linked(self):
+        '''Testing if task cant be linked to groups of another user'''
+        self.login_test_user()
+        owner = User.objects.create_user(username='owner_user', password='abcdeg')
+
+        task = create_task(task_name='Task', user=self.user)
+        other_group = create_group('Other group', user=owner)
+
+        context = {'name': 'Task', 'description': '', 'priority': Task.Priority.HIGH, 
+                   'deadline': timezone.now(), 'group': [other_group.pk]}
+
+        response = self.c.post(reverse('todolist:edit_task', args=[task.pk]), context)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(task.group.exists())
+
 
-class CreateTaskViewTests(TestCase):
+class CreateTaskViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -451,7 +697,7 @@ class CreateTaskViewTests(TestCase):
         task_context = {
             'name': 'Test Task', 
             'description': 'Desc', 
-            'priority': 'Medium', 
+            'priority': Task.Priority.MEDIUM, 
             'deadline': timezone.now(),
             'group': [group1.pk, group2.pk],
             # pk is for validation in the view
@@ -483,7 +729,7 @@ class CreateTaskViewTests(TestCase):
         task_context = {
             'name': 'Test Task', 
             'description': 'Desc', 
-            'priority': 'Medium', 
+            'priority': Task.Priority.MEDIUM, 
             'deadline': timezone.now(),
             'group': [],
         }
@@ -509,8 +755,44 @@ class CreateTaskViewTests(TestCase):
         response = self.c.get(reverse('todolist:index'))
         self.assertQuerySetEqual(response.context['task_list'], [])
 
+    def test_task_create_writes(self):
+        '''Testing if creating of the task is one insert of the task and one bulk insert to the through table'''
+        self.login_test_user()
+
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(3)]
+        context = {'name': 'Test Task', 'description': '', 'priority': Task.Priority.LOW, 
+                   'deadline': timezone.now(), 'group': [group.pk for group in groups]}
+
+        with CaptureQueriesContext(connection) as queries:
+            self.c.post(reverse('todolist:create_task'), context)
+
+        writes = [query['sql'].split()[0] for query in queries
+                  if not query['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE')) and 'todolist_lastmodified' not in query['sql']]
+        self.assertEqual(writes, ['INSERT', 'INSERT'])
+
+        # owner fallback of OwnerMixin isnt queried
+        self.assertFalse([query for query in queries if 'FROM "auth_user" ORDER BY' in query['sql']])
+
+        task = Task.objects.get(name='Test Task')
+        self.assertEqual(task.owner, self.user)
+        self.assertQuerySetEqual(task.group.order_by('pk'), groups)
+
+    def test_other_user_groups_not_linked(self):
+        '''Testing if task isnt created with groups of another user'''
+        self.login_test_user()
+        owner = User.objects.create_user(username='owner_user', password='abcdeg')
+        other_group = create_group('Other group', user=owner)
+
+        context = {'name': 'Test Task', 'description': '', 'priority': Task.Priority.LOW, 
+                   'deadline': timezone.now(), 'group': [other_group.pk]}
+
+        self.c.post(reverse('todolist:create_task'), context)
+
+        self.assertFalse(Task.objects.filter(name='Test Task').exists())
+        self.assertFalse(other_group.task_set.exists())
+
 
-class AddGroupViewTests(TestCase):
+class AddGroupViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -533,7 +815,7 @@ class AddGroupViewTests(TestCase):
         self.assertTrue(added_group.owner, self.user)
 
 
-class DeleteGroupViewTests(TestCase):
+class DeleteGroupViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -556,8 +838,50 @@ class DeleteGroupViewTests(TestCase):
 
         self.assertQuerySetEqual(TaskGroup.objects.all(), [])
 
+    def test_groups_with_same_name_delete(self):
+        '''Testing if groups with the same name are deleted without errors'''
+        self.c.login(username=self.username, password=self.password)
+
+        group1 = create_group(group_name='TestGroup', user=self.user)
+        group2 = create_group(group_name='TestGroup', user=self.user)
+        task = create_task(task_name='Task', groups=[group1, group2], user=self.user)
+
+        response = self.c.post(reverse('todolist:delete_group'), {'group': [group1.pk, group2.pk]})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertQuerySetEqual(TaskGroup.objects.all(), [])
+        self.assertQuerySetEqual(task.group.all(), [])
+
+    def test_other_user_group_isnt_deleted(self):
+        '''Testing if groups of other users stay untouched'''
+        owner = User.objects.create_user(username='owner_user', password='abcdeg')
+        self.c.login(username=self.username, password=self.password)
+
+        group = create_group(group_name='TestGroup', user=owner)
+
+        self.c.post(reverse('todolist:delete_group'), {'group': [group.pk]})
+
+        self.assertQuerySetEqual(TaskGroup.objects.all(), [group])
+
+    def test_query_count_doesnt_depend_on_group_count(self):
+        '''Testing if deleting many groups costs as many queries as deleting one'''
+        self.c.login(username=self.username, password=self.password)
+
+        group = create_group(group_name='TestGroup', user=self.user)
+        groups = [create_group(group_name=f'TestGroup {i}', user=self.user) for i in range(500)]
+        create_task(task_name='Task', groups=groups, user=self.user)
+
+        with CaptureQueriesContext(connection) as one:
+            self.c.post(reverse('todolist:delete_group'), {'group': [group.pk]})
+
+        with CaptureQueriesContext(connection) as many:
+            self.c.post(reverse('todolist:delete_group'), {'group': [g.pk for g in groups]})
+
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+        self.assertQuerySetEqual(TaskGroup.objects.all(), [])
+
 
-class RegisterViewTests(TestCase):
+class RegisterViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
 
@@ -635,6 +959,26 @@ class RegisterViewTests(TestCase):
         self.assertQuerySetEqual(Task.objects.filter(owner_id=user_id), [task])
         self.assertQuerySetEqual(TaskGroup.objects.filter(owner_id=user_id), [group])
 
+    def test_guest_data_conversion_query_count(self):
+        '''Testing if conversion costs the same number of queries for any amount of guest data'''
+        other_guest = Guest.objects.create_guest_user()
+
+        group = create_group(group_name='Group', user=self.guest)
+        create_task(task_name='Task', groups=[group], user=self.guest)
+
+        group = create_group(group_name='Group', user=other_guest)
+        for i in range(30):
+            create_task(task_name=f'Task {i}', groups=[group], user=other_guest)
+
+        with CaptureQueriesContext(connection) as small:
+            convert_guest_data(self.guest, self.user)
+
+        with CaptureQueriesContext(connection) as large:
+            convert_guest_data(other_guest, self.user)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Task.objects.filter(owner_id=self.user.id).count(), 31)
+
     def test_error_message_display(self):
         '''Testing if error message is displayed on the page when validation of form fails'''
         self.login_test_guest()
@@ -700,6 +1044,42 @@ class LoginViewTests(TestCase):
         # test if guest user got deleted
         self.assertNotIn(self.guest, User.objects.all())
 
+    def test_guest_data_conversion(self):
+        '''Testing if tasks and groups of guest goes to the user after log in'''
+        group = create_group(group_name='Group', user=self.guest)
+        task = create_task(task_name='Task', groups=[group], user=self.guest)
+
+        context = {
+            'username': self.username, 
+            'password': self.password,
+        }
+
+        request = self.create_request(user=self.guest, context=context)
+        LoginView(request)
+
+        self.assertQuerySetEqual(Task.objects.filter(owner_id=self.user.id), [task])
+        self.assertQuerySetEqual(TaskGroup.objects.filter(owner_id=self.user.id), [group])
+
+    def test_groups_merge(self):
+        '''Testing if guest group is merged into the user`s group with the same name after log in'''
+        user_group = create_group(group_name='Group', user=self.user)
+        user_task = create_task(task_name='User task', groups=[user_group], user=self.user)
+
+        guest_group = create_group(group_name='Group', user=self.guest)
+        guest_task = create_task(task_name='Guest task', groups=[guest_group], user=self.guest)
+
+        context = {
+            'username': self.username, 
+            'password': self.password,
+        }
+
+        request = self.create_request(user=self.guest, context=context)
+        LoginView(request)
+
+        # test that only user`s group is left and it contains both tasks
+        self.assertQuerySetEqual(TaskGroup.objects.all(), [user_group])
+        self.assertQuerySetEqual(user_group.task_set.order_by('pk'), [user_task, guest_task])
+
     def test_error_message(self):
         '''Testing if error message display works'''
         context = {
@@ -756,7 +1136,7 @@ class LogOutViewTests(TestCase):
         self.assertTrue(request.user.is_anonymous)
 
 
-class DashboardViewTests(TestCase):
+class DashboardViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -766,6 +1146,9 @@ class DashboardViewTests(TestCase):
 
         self.guest = Guest.objects.create_guest_user()
 
+        # locmem cache outlives the test, while rolled back users give their ids to users of the next test
+        cache.clear()
+
     def login_test_user(self):
         self.c.login(username=self.username, password=self.password)
 
@@ -884,6 +1267,75 @@ class DashboardViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context['completed_today'], 0)
 
+    def test_completed_today_ignores_previous_days(self):
+        '''Testing if tasks completed before today arent counted'''
+        self.login_test_user()
+
+        ctask = create_completed_task(task_name='Task', user=self.user)
+        CompletedTask.objects.filter(pk=ctask.pk).update(complete_date=timezone.now() - timedelta(days=2))
+        create_completed_task(task_name='Task', user=self.user)
+
+        response = self.c.get(reverse('todolist:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['completed_today'], 1)
+
+    def test_repeat_hits_are_cached(self):
+        '''Testing if repeated dashboard hit doesnt query anything but the user'''
+        self.login_test_user()
+
+        create_task(task_name='Task', user=self.user)
+        create_completed_task(task_name='Task', user=self.user)
+
+        self.c.get(reverse('todolist:dashboard'))
+
+        # user itself, last modified marker, and the guest check in the view and in the template
+        with self.assertNumQueries(4):
+            response = self.c.get(reverse('todolist:dashboard'))
+
+        self.assertEqual(len(response.context['task_list']), 1)
+        self.assertEqual(response.context['completed_today'], 1)
+
+    def test_cache_invalidated_by_task_create(self):
+        '''Testing if dashboard is rebuilt after user creates a task'''
+        self.login_test_user()
+
+        response = self.c.get(reverse('todolist:dashboard'))
+        self.assertQuerySetEqual(response.context['task_list'], [])
+
+        task_context = {
+            'name': 'Test Task', 
+            'description': 'Desc', 
+            'priority': Task.Priority.MEDIUM, 
+            'deadline': timezone.now(),
+            'group': [],
+        }
+        self.c.post(reverse('todolist:create_task'), task_context)
+
+        response = self.c.get(reverse('todolist:dashboard'))
+        self.assertQuerySetEqual(response.context['task_list'], Task.objects.all())
+
+    def test_cache_invalidated_by_admin_action(self):
+        '''Testing if dashboard is rebuilt after its tasks are completed in admin'''
+        admin_user = User.objects.create_superuser(username='admin', password='12345')
+        admin_client = Client()
+        admin_client.force_login(admin_user)
+
+        self.login_test_user()
+        task = create_task(task_name='Task', user=self.user)
+
+        response = self.c.get(reverse('todolist:dashboard'))
+        self.assertEqual(response.context['completed_today'], 0)
+
+        admin_client.post(
+            reverse('admin:todolist_task_changelist'), 
+            {'action': 'complete_task', '_selected_action': [task.pk]},
+        )
+
+        response = self.c.get(reverse('todolist:dashboard'))
+        self.assertQuerySetEqual(response.context['task_list'], [])
+        self.assertEqual(response.context['completed_today'], 1)
+
     def test_no_tasks_completed_recently_message(self):
         '''Testing if proper message is displayed in completed recently tasks container if user havent completed any tasks'''
         self.login_test_user()
@@ -973,7 +1425,7 @@ class DashboardViewTests(TestCase):
         self.assertQuerySetEqual(response.context['completed_recently'], [])
 
 
-class CleanCompletedTaskViewTests(TestCase):
+class CleanCompletedTaskViewTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.c = Client()
         
@@ -1035,5 +1487,1080 @@ class CleanCompletedTaskViewTests(TestCase):
         self.assertQuerySetEqual(CompletedTask.objects.all(), [])
 
 
+class TaskAPITests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.username = 'test_user'
+        self.password = '12345'
+        self.user = User.objects.create_user(username=self.username, password=self.password)
+        self.c.login(username=self.username, password=self.password)
+
+    def post_json(self, url_name, data):
+        return self.c.post(reverse(url_name), data, content_type='application/json')
+
+    def test_batch_create(self):
+        '''Testing if all tasks of the batch are created with their groups'''
+        group = create_group('TestGroup', user=self.user)
+        deadline = timezone.now() + timedelta(days=1)
+
+        batch = [
+            {'name': 'Task 1', 'priority': 'Low', 'deadline': deadline.isoformat(), 'group': [group.pk]},
+            {'name': 'Task 2', 'priority': 'High', 'deadline': deadline.isoformat()},
+        ]
+        response = self.post_json('todolist:api_create_tasks', batch)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([task['name'] for task in response.json()['tasks']], ['Task 1', 'Task 2'])
+        self.assertEqual([task['priority'] for task in response.json()['tasks']], ['Low', 'High'])
+        self.assertEqual(response.json()['tasks'][0]['group'], [group.pk])
+        self.assertEqual(Task.objects.filter(owner_id=self.user.id).count(), 2)
+
+    def test_bool_ids_rejected(self):
+        '''Testing if true and false arent taken as ids'''
+        task = create_task(task_name='Task', user=self.user)
+        deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+        response = self.post_json('todolist:api_delete_tasks', [True])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
+
+        response = self.post_json('todolist:api_create_tasks', [{'name': 'Task 1', 'priority': 'Low', 'deadline': deadline, 'group': [True]}])
+
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post_json('todolist:api_update_tasks', [{'id': True, 'name': 'Updated'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(name='Updated').exists())
+
+    def test_priority_of_wrong_type(self):
+        '''Testing if priority that isnt a label gives 400 instead of an error'''
+        deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+        response = self.post_json('todolist:api_create_tasks', [{'name': 'Task', 'priority': ['Low'], 'deadline': deadline}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('priority', response.json()['errors']['0'])
+
+    def test_repeated_groups_linked_once(self):
+        '''Testing if group given twice for one task is linked once'''
+        group = create_group('TestGroup', user=self.user)
+        task = create_task(task_name='Task', user=self.user)
+        deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+        response = self.post_json('todolist:api_create_tasks', [{'name': 'Task 1', 'priority': 'Low', 'deadline': deadline, 'group': [group.pk, group.pk]}])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['tasks'][0]['group'], [group.pk])
+
+        response = self.post_json('todolist:api_update_tasks', [{'id': task.pk, 'group': [group.pk, group.pk]}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tasks'][0]['group'], [group.pk])
+
+    def test_invalid_batch_isnt_saved(self):
+        '''Testing if nothing is created when one of the items is invalid'''
+        other_user = User.objects.create_user(username='owner_user', password='abcdeg')
+        other_group = create_group('TestGroup', user=other_user)
+        deadline = timezone.now().isoformat()
+
+        batch = [
+            {'name': 'Task 1', 'priority': 'Low', 'deadline': deadline},
+            {'name': 'Task 2', 'priority': 'Unknown', 'deadline': deadline},
+            {'name': 'Task 3', 'priority': 'Low', 'deadline': deadline, 'group': [other_group.pk]},
+        ]
+        response = self.post_json('todolist:api_create_tasks', batch)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'1', '2'})
+        self.assertFalse(Task.objects.exists())
+
+    def test_list(self):
+        '''Testing if only user`s tasks are listed'''
+        task = create_task(task_name='Task', user=self.user)
+        other_user = User.objects.create_user(username='owner_user', password='abcdeg')
+        create_task(task_name='Other task', user=other_user)
+
+        response = self.c.get(reverse('todolist:api_tasks'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json()['tasks']], [task.pk])
+        self.assertIsNone(response.json()['next'])
+
+    def test_list_tampered_cursor(self):
+        '''Testing if cursor with values of wrong types gives 400'''
+        cursor = base64.urlsafe_b64encode(json.dumps(['2020-01-01T00:00:00+00:00', 'abc']).encode()).decode()
+
+        response = self.c.get(reverse('todolist:api_tasks'), {'after': cursor})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], ['Invalid cursor.'])
+
+    def test_batch_update(self):
+        '''Testing if given fields of the tasks are updated and others stay the same'''
+        group = create_group('TestGroup', user=self.user)
+        task1 = create_task(task_name='Task 1', user=self.user)
+        task2 = create_task(task_name='Task 2', groups=[group], user=self.user)
+
+        batch = [
+            {'id': task1.pk, 'name': 'Updated 1', 'group': [group.pk]},
+            {'id': task2.pk, 'priority': 'Critical'},
+        ]
+        response = self.post_json('todolist:api_update_tasks', batch)
+
+        self.assertEqual(response.status_code, 200)
+
+        task1.refresh_from_db()
+        task2.refresh_from_db()
+
+        self.assertEqual((task1.name, task1.priority), ('Updated 1', Task.Priority.MEDIUM))
+        self.assertEqual((task2.name, task2.priority), ('Task 2', Task.Priority.CRITICAL))
+        self.assertQuerySetEqual(task1.group.all(), [group])
+        self.assertQuerySetEqual(task2.group.all(), [group])
+
+    def test_update_other_user_task(self):
+        '''Testing if tasks of other users cant be updated'''
+        other_user = User.objects.create_user(username='owner_user', password='abcdeg')
+        task = create_task(task_name='Task', user=other_user)
+
+        response = self.post_json('todolist:api_update_tasks', [{'id': task.pk, 'name': 'Updated'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.get(pk=task.pk).name, 'Task')
+
+    def test_batch_complete(self):
+        '''Testing if completed tasks are replaced with completed task records'''
+        tasks = [create_task(task_name=f'Task {i}', user=self.user) for i in range(3)]
+
+        response = self.post_json('todolist:api_complete_tasks', [task.pk for task in tasks[:2]])
+
+        self.assertEqual(response.json(), {'completed': 2})
+        self.assertQuerySetEqual(Task.objects.all(), tasks[2:])
+        self.assertEqual(CompletedTask.objects.filter(owner_id=self.user.id).count(), 2)
+
+    def test_batch_delete(self):
+        '''Testing if only user`s tasks are deleted'''
+        other_user = User.objects.create_user(username='owner_user', password='abcdeg')
+        other_task = create_task(task_name='Other task', user=other_user)
+        task = create_task(task_name='Task', user=self.user)
+
+        response = self.post_json('todolist:api_delete_tasks', [task.pk, other_task.pk])
+
+        self.assertEqual(response.json(), {'deleted': 1})
+        self.assertQuerySetEqual(Task.objects.all(), [other_task])
+
+    def test_groups(self):
+        '''Testing if groups are created, listed and deleted in batches'''
+        response = self.post_json('todolist:api_create_groups', [{'name': 'Group 1'}, {'name': 'Group 2'}])
+        self.assertEqual(response.status_code, 201)
+
+        response = self.c.get(reverse('todolist:api_groups'))
+        groups = response.json()['groups']
+        self.assertEqual([group['name'] for group in groups], ['Group 1', 'Group 2'])
+
+        response = self.post_json('todolist:api_delete_groups', [group['id'] for group in groups])
+        self.assertEqual(response.json(), {'deleted': 2})
+        self.assertFalse(TaskGroup.objects.exists())
+
+    def test_completed_tasks(self):
+        '''Testing if completed tasks are listed and cleaned'''
+        ctask = create_completed_task(task_name='Task', user=self.user)
+
+        response = self.c.get(reverse('todolist:api_completed_tasks'))
+        self.assertEqual([t['id'] for t in response.json()['completed_tasks']], [ctask.pk])
+
+        response = self.post_json('todolist:api_clean_completed_tasks', [ctask.pk])
+        self.assertEqual(response.json(), {'deleted': 1})
+
+    def test_invalid_body(self):
+        '''Testing if 400 is given when request body isnt an array'''
+        response = self.post_json('todolist:api_delete_tasks', {'ids': [1]})
+
+        self.assertEqual(response.status_code, 400)
 
 
+class AsyncViewTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.username = 'test_user'
+        self.password = '12345'
+        self.user = User.objects.create_user(username=self.username, password=self.password)
+
+        self.group = create_group('TestGroup', user=self.user)
+        self.task = create_task(task_name='Task', groups=[self.group], user=self.user)
+        create_completed_task(task_name='Completed task', user=self.user)
+
+        cache.clear()
+
+    async def test_index(self):
+        '''Testing if async index displays tasks of the user with their groups'''
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('todolist:async_index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['task_list'], [self.task])
+        self.assertContains(response, self.group.name)
+
+    async def test_index_for_anonymous_user(self):
+        '''Testing if anonymous user gets a guest and an empty list'''
+        response = await self.async_client.get(reverse('todolist:async_index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'You dont have any tasks yet.')
+
+    async def test_detail(self):
+        '''Testing if async detail page is displayed to the owner only'''
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('todolist:async_detail', args=[self.task.pk]))
+        self.assertContains(response, self.group.name)
+
+        await self.async_client.alogout()
+
+        response = await self.async_client.get(reverse('todolist:async_detail', args=[self.task.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_dashboard(self):
+        '''Testing if async dashboard has the same context as the sync one'''
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('todolist:async_dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['task_list'], [self.task])
+        self.assertEqual(response.context['completed_today'], 1)
+        self.assertEqual(len(response.context['completed_recently']), 1)
+
+    async def test_dashboard_for_anonymous_user(self):
+        '''Testing if anonymous user is redirected to login page'''
+        response = await self.async_client.get(reverse('todolist:async_dashboard'))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('todolist:login')))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is specific to SQLite')
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.username = 'test_user'
+        self.password = '12345'
+        self.user = User.objects.create_user(username=self.username, password=self.password)
+        self.c.login(username=self.username, password=self.password)
+
+        # cached dashboard would skip the queries
+        cache.clear()
+
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(3)]
+
+        for i in range(5):
+            create_task(task_name=f'Task {i}', days=i, groups=groups, user=self.user)
+            create_completed_task(task_name=f'Task {i}', user=self.user)
+
+    def assertIndexedPlans(self, url):
+        '''Runs EXPLAIN QUERY PLAN on the app queries of the view and fails on full scans and sorts'''
+        with CaptureQueriesContext(connection) as context:
+            self.c.get(url)
+
+        for query in context.captured_queries:
+            sql = query['sql']
+
+            # prefetch of groups sorts only rows of the tasks on the page, which is bounded by page size
+            if 'todolist_' not in sql or '_prefetch_related_val' in sql:
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+
+            for step in plan:
+                with self.subTest(sql=sql, step=step):
+                    self.assertFalse(step.startswith('SCAN'))
+                    self.assertNotIn('TEMP B-TREE', step)
+
+    def test_index_plans(self):
+        '''Testing if task list queries use indexes'''
+        self.assertIndexedPlans(reverse('todolist:index'))
+
+    def test_dashboard_plans(self):
+        '''Testing if dashboard queries use indexes'''
+        self.assertIndexedPlans(reverse('todolist:dashboard'))
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.username = 'test_user'
+        self.password = '12345'
+        self.user = User.objects.create_user(username=self.username, password=self.password)
+        self.c.login(username=self.username, password=self.password)
+
+        cache.clear()
+
+        # enough rows for any per-row query to blow the budget
+        self.groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(5)]
+        self.tasks = [create_task(task_name=f'Task {i}', days=i - 10, groups=self.groups, user=self.user) for i in range(20)]
+        self.ctasks = [create_completed_task(task_name=f'Task {i}', user=self.user) for i in range(20)]
+
+    def test_every_url_has_budget(self):
+        '''Testing if every view of todolist declares its query budget'''
+        for pattern in urls.urlpatterns:
+            with self.subTest(url=pattern.name):
+                self.assertIsNotNone(get_query_budget(pattern.callback))
+
+    def test_read_views_within_budget(self):
+        '''Testing if pages with many tasks stay within budgets'''
+        task = self.tasks[0]
+
+        for name, args in [
+            ('index', []), ('index_more', []), ('detail', [task.pk]), ('edit', [task.pk]), ('dashboard', []),
+            ('async_index', []), ('async_detail', [task.pk]), ('async_dashboard', []),
+            ('api_tasks', []), ('api_groups', []), ('api_group_lookup', []), ('api_completed_tasks', []),
+        ]:
+            with self.subTest(url=name):
+                self.assertEqual(self.c.get(reverse(f'todolist:{name}', args=args)).status_code, 200)
+
+    def test_batch_views_within_budget(self):
+        '''Testing if batch endpoints stay within budgets for many rows'''
+        task_ids = json.dumps([task.pk for task in self.tasks])
+
+        self.c.post(reverse('todolist:api_complete_tasks'), task_ids, content_type='application/json')
+        self.c.post(reverse('todolist:api_delete_groups'), json.dumps([group.pk for group in self.groups]), content_type='application/json')
+        self.c.post(reverse('todolist:clean_all_completed_tasks'))
+
+        self.assertFalse(Task.objects.filter(owner_id=self.user.id).exists())
+
+    def test_login_within_budget(self):
+        '''Testing if log in with guest data to convert stays within budget'''
+        self.c.logout()
+        self.c.get(reverse('todolist:index'))
+
+        guest = Guest.objects.get().user
+        for i in range(5):
+            create_task(task_name=f'Guest task {i}', groups=[create_group('TestGroup 0', user=guest)], user=guest)
+
+        response = self.c.post(reverse('todolist:login'), {'username': self.username, 'password': self.password})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.filter(owner_id=self.user.id).count(), 25)
+
+    def test_login_query_count_doesnt_depend_on_guest_data(self):
+        '''Testing if log in costs as many queries for a guest with much data as for an empty one'''
+        counts = []
+
+        for task_count in [1, 20]:
+            self.c.logout()
+            self.c.get(reverse('todolist:index'))
+
+            guest = Guest.objects.latest('pk').user
+            for i in range(task_count):
+                create_task(task_name=f'Guest task {i}', groups=[create_group(f'TestGroup {i}', user=guest)], user=guest)
+
+            with CaptureQueriesContext(connection) as queries:
+                self.c.post(reverse('todolist:login'), {'username': self.username, 'password': self.password})
+
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_exceeded_budget_raises(self):
+        '''Testing if request over the budget fails'''
+        with mock.patch.object(IndexView, 'query_budget', 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.c.get(reverse('todolist:index'))
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+        create_task(task_name='Task', user=self.user)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_timing(self):
+        '''Testing if db, template and total timings are sent in header and logged'''
+        with self.assertLogs('todolist.timing', level='INFO') as logs:
+            response = self.c.get(reverse('todolist:index'))
+
+        header = response['Server-Timing']
+        log = json.loads(logs.records[0].getMessage())
+
+        self.assertIn(f'db;dur={log["db_ms"]:.2f};desc="{log["queries"]} queries"', header)
+        self.assertIn('tpl;dur=', header)
+        self.assertIn('total;dur=', header)
+
+        self.assertEqual(log['view'], 'todolist:index')
+        self.assertEqual(log['queries'], 5)
+        self.assertGreater(log['template_ms'], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_request_out_of_sample(self):
+        '''Testing if requests out of the sample arent timed'''
+        response = self.c.get(reverse('todolist:index'))
+
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    async def test_async_request_timing(self):
+        '''Testing if async views are timed with queries they run in other threads'''
+        await self.async_client.aforce_login(self.user)
+
+        with self.assertLogs('todolist.timing', level='INFO') as logs:
+            response = await self.async_client.get(reverse('todolist:async_index'))
+
+        log = json.loads(logs.records[0].getMessage())
+
+        self.assertIn('Server-Timing', response)
+        self.assertEqual(log['view'], 'todolist:async_index')
+        self.assertGreater(log['queries'], 0)
+
+    def test_middleware_keeps_async_chain(self):
+        '''Testing if the middleware is a coroutine function when the rest of the chain is async'''
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(ServerTimingMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(ServerTimingMiddleware(lambda request: None)))
+
+
+class CleanCompletedTasksJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user', password='12345')
+
+        for i in range(5):
+            create_completed_task(task_name=f'Task {i}', user=self.user)
+
+    def test_purge_in_batches(self):
+        '''Testing if all completed tasks are deleted batch by batch'''
+        # max pk, then select and delete for each batch of 2, and the empty select at the end
+        with self.assertNumQueries(1 + 3 * 3 + 1):
+            deleted = clean_completed_tasks(batch_size=2, pause=0)
+
+        self.assertEqual(deleted, 5)
+        self.assertFalse(CompletedTask.objects.exists())
+
+    def test_purge_stops_after_time_budget(self):
+        '''Testing if purge stops after the batch that ran out of time budget'''
+        deleted = clean_completed_tasks(batch_size=2, pause=0, time_budget=0)
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(CompletedTask.objects.count(), 3)
+
+
+class DeleteExpiredGuestsJobTests(TestCase):
+    def setUp(self):
+        self.guests = [Guest.objects.create_guest_user() for i in range(3)]
+        self.user = User.objects.create_user(username='test_user', password='12345')
+
+        for owner in [*self.guests, self.user]:
+            group = create_group('TestGroup', user=owner)
+            create_task(task_name='Task', groups=[group], user=owner)
+
+        # all of them are old, except the last guest
+        Guest.objects.exclude(user=self.guests[-1]).update(created_at=timezone.now() - timedelta(days=30))
+
+    def test_expired_guests_deleted_with_data(self):
+        '''Testing if expired guests are deleted with their tasks, groups and links'''
+        deleted = delete_expired_guests(max_age=timedelta(days=14).total_seconds(), batch_size=1)
+
+        self.assertEqual(deleted, 2)
+        self.assertQuerySetEqual(User.objects.order_by('pk'), [self.guests[-1], self.user])
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(TaskGroup.objects.count(), 2)
+        self.assertEqual(Task.group.through.objects.count(), 2)
+
+    def test_recently_logged_in_guest_kept(self):
+        '''Testing if old guest that logged in recently isnt deleted'''
+        User.objects.filter(pk=self.guests[0].pk).update(last_login=timezone.now())
+
+        deleted = delete_expired_guests(max_age=timedelta(days=14).total_seconds())
+
+        self.assertEqual(deleted, 1)
+        self.assertTrue(User.objects.filter(pk=self.guests[0].pk).exists())
+
+    def test_recently_active_guest_kept(self):
+        '''Testing if old guest that changed its data recently isnt deleted'''
+        self.c = Client()
+        self.c.force_login(self.guests[0])
+
+        self.c.post(reverse('todolist:add_group'), {'group_name': 'TestGroup'})
+
+        deleted = delete_expired_guests(max_age=timedelta(days=14).total_seconds())
+
+        self.assertEqual(deleted, 1)
+        self.assertTrue(User.objects.filter(pk=self.guests[0].pk).exists())
+
+    def test_reading_guest_kept(self):
+        '''Testing if old guest that only reads pages isnt deleted while its session is alive'''
+        c = Client()
+        c.get(reverse('todolist:index'))
+        guest = Guest.objects.latest('pk')
+
+        month_ago = timezone.now() - timedelta(days=30)
+        Guest.objects.filter(pk=guest.pk).update(created_at=month_ago)
+        User.objects.filter(pk=guest.user_id).update(last_login=month_ago)
+
+        # the day since the last recorded activity has passed
+        with override_settings(GUEST_ACTIVITY_INTERVAL=0):
+            c.get(reverse('todolist:index'))
+
+        delete_expired_guests()
+
+        self.assertTrue(User.objects.filter(pk=guest.user_id).exists())
+
+    def test_guest_activity_recorded_once_a_day(self):
+        '''Testing if requests within a day after the recorded activity dont write it again'''
+        c = Client()
+        c.get(reverse('todolist:index'))
+
+        with CaptureQueriesContext(connection) as queries:
+            c.get(reverse('todolist:index'))
+
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE "auth_user"')])
+
+    def test_long_inactive_guest_deleted(self):
+        '''Testing if guest whose data was changed long ago is deleted'''
+        touch_users(self.guests[0].pk)
+        LastModified.objects.update(value=timezone.now() - timedelta(days=20))
+
+        delete_expired_guests(max_age=timedelta(days=14).total_seconds())
+
+        self.assertFalse(User.objects.filter(pk=self.guests[0].pk).exists())
+
+
+class SweepDeadlinesJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user', password='12345', email='test@example.com')
+        self.guest = Guest.objects.create_guest_user()
+
+        create_task(task_name='Overdue task', days=-0.1, user=self.user)
+        create_task(task_name='Old task', days=-5, user=self.user)
+        create_task(task_name='Upcoming task', days=1, user=self.user)
+        create_task(task_name='Guest task', days=-0.1, user=self.guest)
+
+    def test_digest_per_user(self):
+        '''Testing if user gets one digest with tasks that passed deadline within the window'''
+        sent = sweep_deadlines(window=timedelta(days=1).total_seconds())
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertEqual(mail.outbox[0].subject, '1 of your tasks is overdue')
+        self.assertIn('Overdue task', mail.outbox[0].body)
+        self.assertNotIn('Old task', mail.outbox[0].body)
+        self.assertNotIn('Upcoming task', mail.outbox[0].body)
+
+    def test_sweep_starts_from_high_water_mark(self):
+        '''Testing if next sweep only sends tasks which deadline passed after the previous one'''
+        sweep_deadlines(window=timedelta(days=1).total_seconds())
+
+        mark = HighWaterMark.objects.get(job_id='sweep_deadlines')
+        mark.value -= timedelta(hours=1)
+        mark.save()
+
+        create_task(task_name='New overdue task', days=-0.01, user=self.user)
+        sweep_deadlines()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('New overdue task', mail.outbox[1].body)
+        self.assertNotIn('- Overdue task', mail.outbox[1].body)
+
+    def test_failed_sweep_doesnt_resend_digests(self):
+        '''Testing if digests sent before a failure arent sent again by the next sweep'''
+        other_user = User.objects.create_user(username='other_user', password='12345', email='other@example.com')
+        create_task(task_name='Other overdue task', days=-0.05, user=other_user)
+
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_other_user(backend, messages):
+            if messages[0].to == [other_user.email]:
+                raise ConnectionError('Mail server went away')
+
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', fail_for_other_user):
+            with self.assertRaises(ConnectionError):
+                sweep_deadlines(window=timedelta(days=1).total_seconds())
+
+        sweep_deadlines(window=timedelta(days=1).total_seconds())
+
+        self.assertEqual([message.to for message in mail.outbox], [[self.user.email], [other_user.email]])
+        self.assertEqual(list(HighWaterMark.objects.values_list('job_id', flat=True)), ['sweep_deadlines'])
+
+    def test_digest_subject_counts_tasks(self):
+        '''Testing if subject of the digest says how many tasks are overdue'''
+        create_task(task_name='Other overdue task', days=-0.2, user=self.user)
+
+        sweep_deadlines(window=timedelta(days=1).total_seconds())
+
+        self.assertEqual(mail.outbox[0].subject, '2 of your tasks are overdue')
+
+
+class TaskStatusTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+        cache.clear()
+
+        self.outdated_task = create_task(task_name='Outdated task', days=-1, user=self.user)
+        self.active_task = create_task(task_name='Active task', days=1, user=self.user)
+
+    def test_outdated_annotation(self):
+        '''Testing if outdated flag is computed by the database and used by is_outdated'''
+        tasks = Task.objects.with_outdated().order_by('-outdated')
+
+        self.assertEqual([task.outdated for task in tasks], [True, False])
+        self.assertEqual([task.is_outdated() for task in tasks], [True, False])
+
+    def test_index_status_filter(self):
+        '''Testing if index shows only tasks of the requested status'''
+        for status, tasks in [('outdated', [self.outdated_task]), ('active', [self.active_task]), ('', [self.outdated_task, self.active_task])]:
+            with self.subTest(status=status):
+                response = self.c.get(reverse('todolist:index'), {'status': status})
+
+                self.assertQuerySetEqual(response.context['task_list'], tasks)
+
+    def test_index_status_kept_in_pages(self):
+        '''Testing if pagination links keep the status filter'''
+        create_task(task_name='Active task 2', days=2, user=self.user)
+
+        with mock.patch.object(IndexView, 'paginate_by', 1):
+            response = self.c.get(reverse('todolist:index'), {'status': 'active'})
+
+        self.assertContains(response, '&status=active')
+
+    def test_dashboard_status_filter(self):
+        '''Testing if dashboard caches each status filter separately'''
+        response = self.c.get(reverse('todolist:dashboard'), {'status': 'outdated'})
+        self.assertQuerySetEqual(response.context['task_list'], [self.outdated_task])
+
+        response = self.c.get(reverse('todolist:dashboard'), {'status': 'active'})
+        self.assertQuerySetEqual(response.context['task_list'], [self.active_task])
+
+    def test_admin_outdated_filter(self):
+        '''Testing if admin list can be filtered by outdated status'''
+        admin_user = User.objects.create_superuser(username='admin', password='12345')
+        self.c.force_login(admin_user)
+
+        response = self.c.get(reverse('admin:todolist_task_changelist'), {'status': 'outdated', 'o': '4'})
+
+        self.assertEqual(list(response.context['cl'].queryset), [self.outdated_task])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Search index is built with SQLite FTS5')
+class SearchTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+        self.other_user = User.objects.create_user(username='other_user', password='12345')
+
+        self.name_match = create_task(task_name='Buy groceries', user=self.user)
+        self.desc_match = create_task(task_name='Weekend', desc='Groceries and cooking', user=self.user)
+        create_task(task_name='Call mom', user=self.user)
+        create_task(task_name='Buy groceries', user=self.other_user)
+
+    def search(self, query):
+        return self.c.get(reverse('todolist:search'), {'q': query}).context['task_list']
+
+    def test_ranked_owner_results(self):
+        '''Testing if only user`s tasks are found, with name matches first'''
+        self.assertEqual(self.search('groceries'), [self.name_match, self.desc_match])
+
+    def test_prefix_match(self):
+        '''Testing if every term is matched by prefix'''
+        self.assertEqual(self.search('groc cook'), [self.desc_match])
+
+    def test_query_syntax_is_escaped(self):
+        '''Testing if FTS syntax in the query is searched as plain words'''
+        self.assertEqual(self.search('"buy" OR NOT* call)'), [])
+
+    def test_index_follows_changes(self):
+        '''Testing if index is updated on edit, bulk delete and bulk owner change'''
+        Task.objects.filter(pk=self.name_match.pk).update(name='Buy bread')
+        self.assertEqual(self.search('bread'), [self.name_match])
+
+        delete_tasks(Task.objects.filter(pk=self.name_match.pk))
+        self.assertEqual(self.search('bread'), [])
+
+        Task.objects.filter(owner_id=self.other_user.id).update(owner_id=self.user.id)
+        self.assertEqual(len(self.search('groceries')), 2)
+
+    def test_lost_triggers_recreated(self):
+        '''Testing if triggers dropped by a rebuild of the task table come back after migrate, with the index caught up'''
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER todolist_task_fts_update')
+
+        Task.objects.filter(pk=self.name_match.pk).update(name='Buy bread')
+        ensure_index()
+
+        self.assertEqual(self.search('bread'), [self.name_match])
+
+        Task.objects.filter(pk=self.name_match.pk).update(name='Buy milk')
+        self.assertEqual(self.search('milk'), [self.name_match])
+
+    def test_rebuild_index(self):
+        '''Testing if rebuilt index finds the same tasks'''
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(self.search('groceries'), [self.name_match, self.desc_match])
+
+    def test_admin_search(self):
+        '''Testing if admin search uses the index over all owners'''
+        self.c.force_login(User.objects.create_superuser(username='admin', password='12345'))
+
+        response = self.c.get(reverse('admin:todolist_task_changelist'), {'q': 'grocer'})
+
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+
+class IndexFilterTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+        self.group1 = create_group('TestGroup 1', user=self.user)
+        self.group2 = create_group('TestGroup 2', user=self.user)
+
+        self.low = create_task(task_name='Low', pr=Task.Priority.LOW, days=1, groups=[self.group1, self.group2], user=self.user)
+        self.critical = create_task(task_name='Critical', pr=Task.Priority.CRITICAL, days=3, groups=[self.group2], user=self.user)
+        self.high = create_task(task_name='High', pr=Task.Priority.HIGH, days=5, user=self.user)
+        self.medium = create_task(task_name='Medium', pr=Task.Priority.MEDIUM, days=2, user=self.user)
+
+    def get_tasks(self, **params):
+        return list(self.c.get(reverse('todolist:index'), params).context['task_list'])
+
+    def test_group_filter(self):
+        '''Testing if tasks in any of selected groups are listed once'''
+        self.assertEqual(self.get_tasks(group=[self.group1.pk, self.group2.pk]), [self.low, self.critical])
+
+    def test_priority_filter(self):
+        self.assertEqual(self.get_tasks(priority=[Task.Priority.HIGH, Task.Priority.LOW]), [self.low, self.high])
+
+    def test_deadline_range_filter(self):
+        '''Testing if both days of the range are included'''
+        today = timezone.localdate()
+
+        tasks = self.get_tasks(deadline_after=today + timedelta(days=2), deadline_before=today + timedelta(days=3))
+
+        self.assertEqual(tasks, [self.medium, self.critical])
+
+    def test_invalid_filters_ignored(self):
+        self.assertEqual(len(self.get_tasks(priority=5, deadline_after='tomorrow', sort='name')), 4)
+
+    def test_sort_by_priority_rank(self):
+        '''Testing if tasks are sorted by priority rank instead of alphabetically'''
+        self.assertEqual(self.get_tasks(sort='priority'), [self.critical, self.high, self.medium, self.low])
+
+    def test_priority_label_displayed(self):
+        '''Testing if priority is displayed by its label'''
+        cache.clear()
+        response = self.c.get(reverse('todolist:dashboard'))
+
+        self.assertContains(response, 'Priority: Critical')
+
+    def test_sort_by_creation_date(self):
+        self.assertEqual(self.get_tasks(sort='created'), [self.medium, self.high, self.critical, self.low])
+
+    @mock.patch.object(IndexView, 'paginate_by', 3)
+    def test_sorted_pages(self):
+        '''Testing if next page continues the sort and its link keeps the filters'''
+        response = self.c.get(reverse('todolist:index'), {'sort': 'priority', 'priority': [Task.Priority.LOW, Task.Priority.MEDIUM, Task.Priority.HIGH]})
+        cursor = response.context['page_obj'].next_cursor
+
+        self.assertEqual(list(response.context['task_list']), [self.high, self.medium, self.low])
+        self.assertIsNone(cursor)
+
+        response = self.c.get(reverse('todolist:index'), {'sort': 'priority'})
+        cursor = response.context['page_obj'].next_cursor
+
+        self.assertContains(response, 'sort=priority')
+        self.assertEqual(self.get_tasks(sort='priority', after=cursor), [self.low])
+
+
+class GroupPickerTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+    def lookup(self, **params):
+        return self.c.get(reverse('todolist:api_group_lookup'), params).json()
+
+    def test_prefix_lookup(self):
+        '''Testing if groups are looked up by the start of their names regardless of case'''
+        for name in ['Work', 'workout', 'Home', 'Homework']:
+            create_group(name, user=self.user)
+
+        groups = self.lookup(q='wor')['groups']
+
+        self.assertEqual([group['name'] for group in groups], ['Work', 'workout'])
+
+    def test_other_user_groups_not_looked_up(self):
+        owner = User.objects.create_user(username='owner', password='abcdeg')
+        create_group('Work', user=owner)
+
+        self.assertEqual(self.lookup(q='Work')['groups'], [])
+
+    def test_lookup_pages(self):
+        '''Testing if all groups are listed page by page'''
+        groups = [create_group(f'Group {i:02}', user=self.user) for i in range(30)]
+
+        page = self.lookup()
+        next_page = self.lookup(after=page['next'])
+
+        self.assertEqual([group['id'] for group in page['groups'] + next_page['groups']], [group.pk for group in groups])
+        self.assertIsNone(next_page['next'])
+
+    def test_only_selected_groups_rendered(self):
+        '''Testing if task form on the edit page has options only for groups of the task'''
+        groups = [create_group(f'TestGroup {i}', user=self.user) for i in range(5)]
+        task = create_task(task_name='Task', groups=groups[:2], user=self.user)
+
+        response = self.c.get(reverse('todolist:edit', args=[task.pk]))
+
+        self.assertContains(response, f'<option value="{groups[0].pk}" selected>TestGroup 0</option>', html=True)
+        self.assertNotContains(response, 'TestGroup 4')
+
+    def test_index_doesnt_grow_with_groups(self):
+        '''Testing if size and query count of the index dont depend on the number of groups'''
+        create_group('TestGroup', user=self.user)
+        response = self.c.get(reverse('todolist:index'))
+
+        for i in range(50):
+            create_group(f'TestGroup {i}', user=self.user)
+
+        with self.assertNumQueries(4):
+            self.assertEqual(len(self.c.get(reverse('todolist:index')).content), len(response.content))
+
+
+class TaskRowCacheTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+        self.group = create_group('TestGroup', user=self.user)
+        self.tasks = [create_task(task_name=f'Task {i}', days=i + 1, groups=[self.group], user=self.user) for i in range(3)]
+
+    def get_index(self):
+        return self.c.get(reverse('todolist:index'))
+
+    def test_unchanged_rows_served_from_cache(self):
+        '''Testing if rows of unchanged tasks are taken from cache without fetching their groups'''
+        first = self.get_index()
+
+        with self.assertNumQueries(4):
+            second = self.get_index()
+
+        self.assertEqual([task.row for task in first.context['task_list']], [task.row for task in second.context['task_list']])
+        self.assertEqual(get_task_row_stats()[:2], (3, 3))
+
+    def test_changed_task_rerendered(self):
+        self.get_index()
+        task = self.tasks[0]
+
+        context = {'name': 'Updated task', 'description': '', 'priority': Task.Priority.HIGH, 
+                   'deadline': task.deadline, 'group': []}
+        self.c.post(reverse('todolist:edit_task', args=[task.pk]), context)
+
+        response = self.get_index()
+
+        self.assertContains(response, 'Updated task')
+        self.assertEqual(get_task_row_stats()[:2], (2, 4))
+
+    def test_group_changes_rerender_rows(self):
+        '''Testing if rows are rendered again after their groups are changed or deleted'''
+        self.get_index()
+
+        other_group = create_group('Other group', user=self.user)
+        self.tasks[0].group.add(other_group)
+        self.assertContains(self.get_index(), 'TestGroup - Other group')
+
+        self.c.post(reverse('todolist:delete_group'), {'group': [self.group.pk]})
+        self.assertNotContains(self.get_index(), 'TestGroup')
+
+    def test_outdated_task_rerendered(self):
+        self.get_index()
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=36)):
+            response = self.get_index()
+
+        self.assertContains(response, "<span class='outdated'>Outdated</span>", count=1)
+
+    def test_csrf_token_not_cached(self):
+        '''Testing if rows dont hold csrf token of the request they were rendered for'''
+        response = self.get_index()
+        rows = ''.join(task.row for task in response.context['task_list'])
+
+        self.assertNotIn('csrfmiddlewaretoken', rows)
+        self.assertEqual(rows.count("form='task_complete_form'"), 3)
+        self.assertContains(response, "id='task_complete_form'")
+
+    def test_stats_command(self):
+        self.get_index()
+        self.get_index()
+
+        out = StringIO()
+
+        # the command runs in a process of its own, so it reads the counters from a shared cache only
+        with mock.patch('todolist.caching.cache_is_shared', return_value=True):
+            call_command('task_row_cache_stats', '--reset', stdout=out)
+
+        self.assertIn('3 hits, 3 misses, hit ratio 50.0%', out.getvalue())
+        self.assertEqual(get_task_row_stats(), (0, 0, 0))
+
+    def test_stats_command_with_locmem_cache(self):
+        '''Testing if the command refuses to show counters of its own process'''
+        with self.assertRaises(CommandError):
+            call_command('task_row_cache_stats', stdout=StringIO())
+
+
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.c = Client()
+
+        self.user = User.objects.create_user(username='test_user', password='12345')
+        self.c.force_login(self.user)
+
+        self.task = create_task(task_name='Task', days=1, user=self.user)
+
+    def get(self, name, *args, response=None):
+        headers = {'If-None-Match': response['ETag']} if response else {}
+        return self.c.get(reverse(f'todolist:{name}', args=args), headers=headers)
+
+    def test_unchanged_pages_not_modified(self):
+        '''Testing if pages are answered with 304 without list queries while nothing changed'''
+        # user and last modified marker, dashboard also checks if user isnt a guest
+        for name, args, queries in [('index', [], 2), ('detail', [self.task.pk], 2), ('dashboard', [], 3)]:
+            with self.subTest(url=name):
+                response = self.get(name, *args)
+
+                self.assertIn('private', response['Cache-Control'])
+                self.assertIn('Last-Modified', response)
+
+                with self.assertNumQueries(queries):
+                    self.assertEqual(self.get(name, *args, response=response).status_code, 304)
+
+    def test_write_modifies_pages(self):
+        response = self.get('index')
+
+        self.c.post(reverse('todolist:add_group'), {'group_name': 'TestGroup'})
+
+        self.assertEqual(self.get('index', response=response).status_code, 200)
+
+    def test_passed_deadline_modifies_pages(self):
+        '''Testing if pages are modified when a task becomes outdated without any writes'''
+        response = self.get('index')
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=2)):
+            self.assertEqual(self.get('index', response=response).status_code, 200)
+
+    def test_passed_deadline_refreshes_dashboard(self):
+        '''Testing if cached active dashboard drops a task once its deadline passes, under a new ETag'''
+        noon = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+
+        with mock.patch('django.utils.timezone.now', return_value=noon):
+            task = create_task(task_name='Soon outdated task', days=1 / 24, user=self.user)
+            response = self.c.get(reverse('todolist:dashboard'), {'status': 'active'})
+            async_response = self.c.get(reverse('todolist:async_dashboard'), {'status': 'active'})
+
+        self.assertIn(task, response.context['task_list'])
+        self.assertIn(task, async_response.context['task_list'])
+
+        with mock.patch('django.utils.timezone.now', return_value=noon + timedelta(hours=2)):
+            new_response = self.c.get(reverse('todolist:dashboard'), {'status': 'active'}, headers={'If-None-Match': response['ETag']})
+            async_response = self.c.get(reverse('todolist:async_dashboard'), {'status': 'active'})
+
+        self.assertEqual(new_response.status_code, 200)
+        self.assertNotEqual(new_response['ETag'], response['ETag'])
+        self.assertNotIn(task, new_response.context['task_list'])
+        self.assertNotIn(task, async_response.context['task_list'])
+
+    def test_other_user_etag_doesnt_match(self):
+        response = self.get('index')
+
+        other_user = User.objects.create_user(username='other_user', password='12345')
+        self.c.force_login(other_user)
+
+        self.assertEqual(self.get('index', response=response).status_code, 200)
+
+    def test_scheduler_job_modifies_pages(self):
+        create_completed_task(task_name='Task', user=self.user)
+        response = self.get('dashboard')
+
+        clean_completed_tasks(batch_size=10, pause=0)
+
+        self.assertEqual(self.get('dashboard', response=response).status_code, 200)
+
+class BenchmarkCommandsTests(TestCase):
+    def test_seed_and_run_benchmark(self):
+        '''Testing if benchmark runs on seeded data and writes timings, query count and memory of the url'''
+        call_command('seed_benchmark_data', users=1, tasks=5, groups=2, completed=2, stdout=StringIO())
+
+        self.assertEqual(Task.objects.count(), 5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'benchmark.json'
+            call_command('run_benchmarks', iterations=2, only=['index'], output=str(output), stdout=StringIO(), stderr=StringIO())
+
+            report = json.loads(output.read_text())
+
+        result = report['results']['index']
+
+        self.assertEqual(result['status'], 200)
+        self.assertEqual(report['data']['tasks'], 5)
+        self.assertGreater(result['queries'], 0)
+        self.assertGreater(result['peak_memory_kb'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+
+    def collectstatic(self):
+        storages = {**settings.STORAGES, 'staticfiles': {'BACKEND': 'todolist.storage.CompressedManifestStaticFilesStorage'}}
+
+        with override_settings(STATIC_ROOT=self.static_root.name, STORAGES=storages):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_collectstatic_makes_hashed_compressed_files(self):
+        self.collectstatic()
+        root = Path(self.static_root.name)
+
+        manifest = json.loads((root / 'staticfiles.json').read_text())['paths']
+
+        for name in ['todolist/style.css', 'todolist/todolist.js']:
+            with self.subTest(name=name):
+                hashed_name = manifest[name]
+                self.assertNotEqual(hashed_name, name)
+
+                content = (root / hashed_name).read_bytes()
+                self.assertEqual(gzip.decompress((root / (hashed_name + '.gz')).read_bytes()), content)
+
+    def test_pages_dont_load_scripts_from_cdn(self):
+        self.c = Client()
+        response = self.c.get(reverse('todolist:index'), follow=True)
+
+        self.assertNotContains(response, 'code.jquery.com')
+        self.assertContains(response, 'todolist/todolist.js')
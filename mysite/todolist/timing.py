@@ -0,0 +1,147 @@
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+
+logger = logging.getLogger(__name__)
+
+# timing of the request being handled, None when the request isnt sampled
+current_timing = ContextVar('current_timing', default=None)
+
+
+class RequestTiming:
+    '''Collects time spent on queries and templates during one request'''
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.template_time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def time_query(execute, sql, params, many, context):
+    '''Execute wrapper installed on every connection, times queries of sampled requests;
+    Async views run queries in other threads, so the timing is found by context rather than by connection'''
+    timing = current_timing.get()
+
+    if timing is None:
+        return execute(sql, params, many, context)
+
+    return timing(execute, sql, params, many, context)
+
+def install_query_timing(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timing = current_timing.get()
+
+        if timing is None:
+            return super().render(context, request)
+
+        start = time.perf_counter()
+
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    '''Django template backend that adds render time of templates to timing of the request'''
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    '''Times db, templates and the whole request for a share of requests set by SERVER_TIMING_SAMPLE_RATE;
+    Timings are sent in Server-Timing header and logged as JSON'''
+
+    # async requests stay async through the middleware, instead of holding a thread each
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.sampled():
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+
+        return self.report(request, response, timing, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timing.reset(token)
+
+        return self.report(request, response, timing, time.perf_counter() - start)
+
+    def sampled(self):
+        return random.random() < getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 0)
+
+    def report(self, request, response, timing, total):
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timing.db_time * 1000:.2f};desc="{timing.queries} queries"',
+            f'tpl;dur={timing.template_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+        match = request.resolver_match
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(timing.db_time * 1000, 2),
+            'queries': timing.queries,
+            'template_ms': round(timing.template_time * 1000, 2),
+        }))
+
+        return response
@@ -1,11 +1,15 @@
 from django.urls import path
 
-from . import views
+from . import views, api, async_views
 
 app_name = 'todolist'
 
 urlpatterns = [
     path('', views.IndexView.as_view(), name='index'),
+    path('more/', views.IndexMoreView.as_view(), name='index_more'),
+    path('async/', async_views.AsyncIndexView.as_view(), name='async_index'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('async/<int:pk>/', async_views.AsyncDetailView.as_view(), name='async_detail'),
     path('<int:pk>/', views.DetailView.as_view(), name='detail'),
     path('<int:pk>/edit/', views.EditView.as_view(), name='edit'),
     
@@ -22,6 +26,21 @@ urlpatterns = [
     path('logout/', views.LogOutView, name='logout'),
 
     path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('async/dashboard/', async_views.AsyncDashboardView.as_view(), name='async_dashboard'),
     path('<int:ctask_id>/clean_completed/', views.CleanCompletedTask, name='clean_completed_task'),
     path('clean_all_completed/', views.CleanCompletedTask, name='clean_all_completed_tasks'),
+
+    path('api/tasks/', api.TasksAPI, name='api_tasks'),
+    path('api/tasks/create/', api.CreateTasksAPI, name='api_create_tasks'),
+    path('api/tasks/update/', api.UpdateTasksAPI, name='api_update_tasks'),
+    path('api/tasks/complete/', api.CompleteTasksAPI, name='api_complete_tasks'),
+    path('api/tasks/delete/', api.DeleteTasksAPI, name='api_delete_tasks'),
+
+    path('api/groups/', api.GroupsAPI, name='api_groups'),
+    path('api/groups/lookup/', api.GroupLookupAPI, name='api_group_lookup'),
+    path('api/groups/create/', api.CreateGroupsAPI, name='api_create_groups'),
+    path('api/groups/delete/', api.DeleteGroupsAPI, name='api_delete_groups'),
+
+    path('api/completed/', api.CompletedTasksAPI, name='api_completed_tasks'),
+    path('api/completed/clean/', api.CleanCompletedTasksAPI, name='api_clean_completed_tasks'),
 ]
\ No newline at end of file
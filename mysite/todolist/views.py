@@ -1,7 +1,15 @@
 from django.shortcuts import render, redirect, get_object_or_404, HttpResponseRedirect
 from django.http import Http404
 from django.views import generic
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.utils.decorators import method_decorator
 from django.urls import reverse
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 
 from django.contrib.auth.models import auth
 from django.contrib.auth import authenticate
@@ -12,16 +20,84 @@ from guest_user.decorators import allow_guest_user, regular_user_required, guest
 from guest_user.mixins import AllowGuestUserMixin, RegularUserRequiredMixin
 
 from .models import Task, TaskGroup, CompletedTask
-from .forms import TaskForm, GroupForm, LoginForm, CreateUserForm
+from .forms import TaskForm, TaskFilterForm, GroupForm, LoginForm, CreateUserForm
+from .pagination import KeysetPaginator, InvalidCursor
+from .caching import get_dashboard, touch_users, get_task_rows, get_last_modified
+from .querybudget import query_budget
+from .search import search_tasks
 
 
-def format_groups(task, user_id):
-    '''Filter first 3 groups of the task that belong to user'''
-    group_names = [group.name for group in task.group.filter(owner_id=user_id)[:3]]
+TASK_STATUSES = ['active', 'outdated']
+
+
+def prefetch_user_groups(user_id):
+    '''Prefetches first 3 groups of each task that belong to user in a single query'''
+    groups = TaskGroup.objects.filter(owner_id=user_id).order_by('pk')[:3]
+
+    return Prefetch('group', queryset=groups, to_attr='user_groups')
+
+def format_groups(task):
+    '''Format groups prefetched with prefetch_user_groups'''
+    group_names = [group.name for group in task.user_groups]
 
     # format these groups
     task.group_names = " - ".join(group_names)
 
+def render_task_rows(tasks, user_id):
+    '''Sets rendered row of every task of the list, rows of unchanged tasks come from cache;
+    Groups are fetched only for tasks whose rows arent cached'''
+    def render(missed):
+        prefetch_related_objects(missed, prefetch_user_groups(user_id))
+
+        for task in missed:
+            format_groups(task)
+
+        return [render_to_string('todolist/task_row.html', {'task': task}) for task in missed]
+
+    for task, row in zip(tasks, get_task_rows(tasks, render)):
+        task.row = mark_safe(row)
+
+def get_status(request):
+    '''Returns status filter of tasks given in request, empty string if there is none'''
+    status = request.GET.get('status', '')
+
+    return status if status in TASK_STATUSES else ''
+
+def page_last_modified(request, *args, **kwargs):
+    '''Returns when pages of the user last changed, None for anonymous users whose pages arent conditional;
+    Besides writes, pages change when deadlines pass and when a new day starts'''
+    user = request.user
+
+    if not user.is_authenticated:
+        return None
+
+    # computed once for both ETag and Last-Modified
+    if not hasattr(request, 'page_last_modified'):
+        now = timezone.now()
+        today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        marker, passed_deadline = get_last_modified(user, deadlines_before=now)
+
+        # dashboard keys its cache by it
+        request.passed_deadline = passed_deadline
+        request.page_last_modified = max(value for value in [marker, passed_deadline, today] if value)
+
+    return request.page_last_modified
+
+def page_etag(request, *args, **kwargs):
+    last_modified = page_last_modified(request)
+
+    if last_modified is None:
+        return None
+
+    return f'{request.user.id}-{last_modified.timestamp():.6f}'
+
+# Pages are answered with 304 before any list query while nothing has changed;
+# Browsers revalidate them on every visit and shared caches dont store them
+conditional_page = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=page_etag, last_modified_func=page_last_modified),
+]
+
 def make_completed_task_record(task):
     '''Makes completed task record for given task'''
     task_name = task.name
@@ -29,6 +105,62 @@ def make_completed_task_record(task):
 
     CompletedTask.objects.create(name=task_name, owner_id=task_owner)
 
+def complete_tasks(tasks, batch_size=1000):
+    '''Makes completed task records for tasks of given queryset and deletes them batch by batch;
+    Returns the number of completed tasks'''
+    task_ids = list(tasks.values_list('pk', flat=True))
+    owner_ids = set()
+
+    for start in range(0, len(task_ids), batch_size):
+        batch = Task.objects.filter(pk__in=task_ids[start:start + batch_size])
+        rows = batch.values_list('name', 'owner_id')
+
+        with transaction.atomic():
+            CompletedTask.objects.bulk_create([CompletedTask(name=name, owner_id=owner_id) for name, owner_id in rows])
+            delete_tasks(batch)
+
+        owner_ids.update(owner_id for name, owner_id in rows)
+
+    touch_users(*owner_ids)
+
+    return len(task_ids)
+
+def delete_rows(queryset):
+    '''Deletes rows of the queryset with one DELETE, where delete() would load them and delete them in chunks of 100;
+    Delete signals and cascades are skipped, so rows that refer to these have to be deleted first'''
+    return queryset._raw_delete(queryset.db)
+
+def delete_tasks(tasks):
+    '''Deletes tasks of given queryset, first their links to groups, then the tasks, one statement each;
+    Returns the number of deleted tasks'''
+    with transaction.atomic():
+        delete_rows(Task.group.through.objects.filter(task__in=tasks))
+        return delete_rows(tasks)
+
+def delete_groups(groups):
+    '''Deletes groups of given queryset with their links to tasks in two statements, for any number of groups;
+    Returns the number of deleted groups'''
+    with transaction.atomic():
+        # tasks of the groups are rendered without them from now on
+        Task.objects.filter(group__in=groups).touch()
+
+        delete_rows(Task.group.through.objects.filter(taskgroup__in=groups))
+        return delete_rows(groups)
+
+def link_groups(tasks_with_groups, created=False):
+    '''Replaces groups of given tasks with bulk writes to the through table;
+    Tasks with None instead of groups keep their groups, just created tasks have none to remove'''
+    Link = Task.group.through
+    relinked = [task.pk for task, groups in tasks_with_groups if groups is not None]
+
+    if relinked and not created:
+        Link.objects.filter(task_id__in=relinked).delete()
+
+    Link.objects.bulk_create(
+        [Link(task_id=task.pk, taskgroup_id=group_id) for task, groups in tasks_with_groups for group_id in groups or []],
+        ignore_conflicts=True,
+    )
+
 def delete_guest_user(guest_user):
     '''Deletes user if it is guest indeed'''
 
@@ -36,50 +168,120 @@ def delete_guest_user(guest_user):
         user = User.objects.get(pk=guest_user.id)
         user.delete()
 
-def convert_guest_data(guest, user):
-    '''Converts tasks and groups of guest user to other user'''
+def merge_guest_groups(guest, user):
+    '''Moves tasks from guest groups to the user`s groups with the same name and drops guest ones'''
+    user_groups = TaskGroup.objects.filter(owner_id=user.id)
+    colliding_groups = TaskGroup.objects.filter(owner_id=guest.id, name__in=user_groups.values('name'))
+    group_ids = dict(user_groups.values_list('name', 'pk'))
 
-    def convert_guest_tasks(guest, user):
-        tasks = Task.objects.filter(owner_id=guest.id)
+    Link = Task.group.through
+    links = Link.objects.filter(taskgroup__in=colliding_groups).values_list('task_id', 'taskgroup__name')
 
-        for task in tasks:
-            task.owner_id = user.id
-            task.save()
+    Link.objects.bulk_create(
+        [Link(task_id=task_id, taskgroup_id=group_ids[name]) for task_id, name in links],
+        ignore_conflicts=True,
+    )
+    delete_groups(colliding_groups)
+
+def convert_guest_data(guest, user, merge_groups=False):
+    '''Converts tasks and groups of guest user to other user;
+    Done with bulk updates in one transaction, so it costs the same for any amount of data.'''
+
+    if not is_guest_user(guest):
+        return
 
-    def convert_guest_groups(guest, user):
-        groups = TaskGroup.objects.filter(owner_id=guest.id)
+    with transaction.atomic():
+        if merge_groups:
+            merge_guest_groups(guest, user)
 
-        for group in groups:
-            group.owner_id = user.id
-            group.save()
+        Task.objects.filter(owner_id=guest.id).update(owner_id=user.id)
+        TaskGroup.objects.filter(owner_id=guest.id).update(owner_id=user.id)
+        CompletedTask.objects.filter(owner_id=guest.id).update(owner_id=user.id)
 
-    if is_guest_user(guest):
-        convert_guest_tasks(guest, user)
-        convert_guest_groups(guest, user)
+    touch_users(user.id)
 
 
+@query_budget(7)
+@method_decorator(conditional_page, name='get')
 class IndexView(AllowGuestUserMixin, generic.ListView):
     template_name = 'todolist/index.html'
+    paginate_by = 50
+    ordering = ['deadline', 'id']
 
     def get_queryset(self):
-        user_id = self.request.user.id
-        task_list = Task.objects.prefetch_related('group').filter(owner_id=user_id)
+        task_list = Task.objects.filter(owner_id=self.request.user.id)
+
+        self.filter_form = TaskFilterForm(self.request.GET, user=self.request.user)
+
+        return self.filter_form.filter(task_list.with_outdated())
+
+    def get_ordering(self):
+        return self.filter_form.get_ordering()
+
+    def paginate_queryset(self, queryset, page_size):
+        '''Paginates by cursor of the sort fields, since OFFSET gets slower with every page'''
+        paginator = KeysetPaginator(queryset, self.get_ordering(), page_size)
+
+        try:
+            page = paginator.get_page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidCursor:
+            raise Http404('Invalid page')
 
-        for task in task_list:
-            format_groups(task, user_id)
+        render_task_rows(page.object_list, self.request.user.id)
 
-        return task_list
+        return (paginator, page, page.object_list, page.has_other_pages())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['task_form'] = TaskForm(user=self.request.user)
+        context['filter_form'] = self.filter_form
+        context['filter_query'] = self.filter_form.get_query_string()
 
         return context
 
+@query_budget(4)
+class IndexMoreView(IndexView):
+    # Renders only task rows of the next page, for "load more" button
+    template_name = 'todolist/task_rows.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(IndexView, self).get_context_data(**kwargs)
+        context['filter_query'] = self.filter_form.get_query_string()
+
+        return context
+
+@query_budget(4)
+class SearchView(AllowGuestUserMixin, generic.ListView):
+    template_name = 'todolist/search.html'
+    context_object_name = 'task_list'
+
+    def get_queryset(self):
+        user_id = self.request.user.id
+        tasks = list(search_tasks(user_id, self.request.GET.get('q', '')).prefetch_related(prefetch_user_groups(user_id)))
+
+        for task in tasks:
+            format_groups(task)
+
+        return tasks
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+
+        return context
+
+@query_budget(5)
+@method_decorator(conditional_page, name='get')
 class DetailView(AllowGuestUserMixin, generic.DetailView):
     model = Task
     template_name = 'todolist/detail.html'
 
+    def get_queryset(self):
+        return Task.objects.prefetch_related(prefetch_user_groups(self.request.user.id))
+
     def get_object(self, queryset=None):
         user_id = self.request.user.id
 
@@ -91,10 +293,11 @@ class DetailView(AllowGuestUserMixin, generic.DetailView):
             if task.owner_id != user_id:
                 raise Http404('Task doesnt exist')
 
-        format_groups(task, user_id)
+        format_groups(task)
 
         return task
 
+@query_budget(7)
 @allow_guest_user
 def CompleteTask(request, task_id):
     user = request.user
@@ -106,8 +309,11 @@ def CompleteTask(request, task_id):
         make_completed_task_record(task)
 
     task.delete()
+    touch_users(user.id)
+
     return redirect('todolist:index')
 
+@query_budget(5)
 @allow_guest_user
 def DeleteTask(request, task_id):
     user_id = request.user.id
@@ -115,8 +321,11 @@ def DeleteTask(request, task_id):
     task = get_object_or_404(Task, pk=task_id, owner_id=user_id)
     
     task.delete()
+    touch_users(user_id)
+
     return redirect('todolist:index')
 
+@query_budget(7)
 class EditView(AllowGuestUserMixin, generic.DetailView):
     # Loads a page with form for editing task instance
     model = Task
@@ -133,56 +342,60 @@ class EditView(AllowGuestUserMixin, generic.DetailView):
 
         return context
 
+@query_budget(9)
 @allow_guest_user
 def EditTask(request, task_id):
-    # check if such task exists in the first place
-    get_object_or_404(Task, pk=task_id, owner_id=request.user.id)
-
     if request.method == "POST":
-        form = TaskForm(request.POST)
+        form = TaskForm(request.POST, user=request.user)
 
-        if form.is_valid():
-            cleaned_data = form.cleaned_data
-            groups = cleaned_data.pop('group') # Removing many-to-many field from cleaned_data
+        if not form.is_valid():
+            raise Http404('The changes you made arent valid.')
 
-            Task.objects.filter(pk=task_id).update(**cleaned_data)
+        cleaned_data = form.cleaned_data
+        groups = cleaned_data.pop('group') # Removing many-to-many field from cleaned_data
 
-            task = Task.objects.get(pk=task_id)
-            task.group.set(groups)
-            task.save()
-        else:
-            raise Http404('The changes you made arent valid.')
+        with transaction.atomic():
+            # the update itself checks if such task exists and belongs to the user
+            if not Task.objects.filter(pk=task_id, owner_id=request.user.id).update(**cleaned_data, updated_at=timezone.now()):
+                raise Http404('No Task matches the given query.')
+
+            link_groups([(Task(pk=task_id), [group.pk for group in groups])])
 
-        return HttpResponseRedirect(reverse('todolist:index'))
+        touch_users(request.user.id)
 
+    return HttpResponseRedirect(reverse('todolist:index'))
+
+@query_budget(8)
 @allow_guest_user
 def CreateTask(request):
     if request.method == "POST":
-        form = TaskForm(request.POST)
+        form = TaskForm(request.POST, user=request.user)
 
         if form.is_valid():
-            cleaned_data = form.cleaned_data
-            groups = cleaned_data.pop('group')
-
-            new_task = Task.objects.create(**cleaned_data)
-            new_task.group.set(groups)
+            new_task = form.save(commit=False)
             new_task.owner_id = request.user.id
-            new_task.save()
+
+            with transaction.atomic():
+                new_task.save()
+                link_groups([(new_task, [group.pk for group in form.cleaned_data['group']])], created=True)
+
+            touch_users(request.user.id)
 
     return HttpResponseRedirect(reverse('todolist:index'))
 
+@query_budget(4)
 @allow_guest_user
 def AddGroup(request):
     if request.method == "POST":
 
         group_name = request.POST.get('group_name')
-        new_group = TaskGroup.objects.create(name=group_name)
-        new_group.owner_id = request.user.id
-        new_group.save()
+        TaskGroup.objects.create(name=group_name, owner_id=request.user.id)
+        touch_users(request.user.id)
 
     # redirect to the page where user`ve been
     return redirect(request.META.get('HTTP_REFERER', '/'))
 
+@query_budget(8)
 @allow_guest_user
 def DeleteGroup(request):
     if request.method == "POST":
@@ -192,11 +405,12 @@ def DeleteGroup(request):
         if form.is_valid():
             selected_groups = form.cleaned_data['group']
 
-            for group in selected_groups:
-                TaskGroup.objects.get(name=group.name, owner_id = request.user.id).delete()
+            delete_groups(selected_groups.filter(owner_id=request.user.id))
+            touch_users(request.user.id)
 
     return redirect(request.META.get('HTTP_REFERER', '/'))
 
+@query_budget(12)
 @guest_user_required
 def RegisterView(request):
     guest = request.user
@@ -225,6 +439,9 @@ def RegisterView(request):
 
     return render(request, 'todolist/register.html', context=context)
 
+# the same for any amount of guest data: set-based merge and conversion of the data (about 15),
+# log in and the cascade of the guest user delete over every table that refers to users (about 15)
+@query_budget(31)
 @guest_user_required
 def LoginView(request):
     guest = request.user
@@ -240,6 +457,10 @@ def LoginView(request):
             user = authenticate(request, username=username, password=password)
 
             if user is not None:
+                # groups with the same name are merged, since user might already have them;
+                # conversion marks data of the user as modified, so pages cached with old csrf token arent reused
+                convert_guest_data(guest, user, merge_groups=True)
+
                 auth.login(request, user)
                 delete_guest_user(guest)
 
@@ -251,29 +472,54 @@ def LoginView(request):
 
     return render(request, 'todolist/login.html', context=context)
 
+@query_budget(2)
 @regular_user_required
 def LogOutView(request):
     auth.logout(request)
 
     return redirect(reverse('todolist:index'))
 
+@query_budget(7)
+@method_decorator(conditional_page, name='get')
 class DashboardView(RegularUserRequiredMixin, generic.ListView):
     template_name = 'todolist/dashboard.html'
+    context_object_name = 'task_list'
+
+    def get_dashboard(self):
+        '''Returns cached dashboard of the user, it`s rebuilt only after user changes something'''
+        user_id = self.request.user.id
+        status = get_status(self.request)
+
+        # beginning of the day in the current timezone
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def build():
+            completed_tasks = CompletedTask.objects.filter(owner_id=user_id)
+
+            return {
+                'task_list': list(Task.objects.filter(owner_id=user_id).with_status(status).order_by('deadline')[:5]),
+                'completed_recently': list(completed_tasks.order_by('complete_date')[:4]),
+                'completed_today': completed_tasks.filter(complete_date__gte=today).count(),
+            }
+
+        page_last_modified(self.request)
+
+        return get_dashboard(user_id, today.date(), build, variant=status, passed_deadline=self.request.passed_deadline)
 
     def get_queryset(self):
-        task_list = Task.objects.filter(owner_id=self.request.user.id).order_by('deadline')[:5]
+        self.dashboard = self.get_dashboard()
 
-        return task_list
+        return self.dashboard['task_list']
     
     def get_context_data(self, **kwargs):
-        completed_recently = CompletedTask.objects.filter(owner_id=self.request.user.id)
-
         context = super().get_context_data(**kwargs)
-        context['completed_recently'] = completed_recently.order_by('complete_date')[:4]
-        context['completed_today'] = len(completed_recently)
+        context['completed_recently'] = self.dashboard['completed_recently']
+        context['completed_today'] = self.dashboard['completed_today']
+        context['status'] = get_status(self.request)
 
         return context
 
+@query_budget(5)
 @regular_user_required
 def CleanCompletedTask(request, ctask_id=None):
     user_id = request.user.id
@@ -291,4 +537,6 @@ def CleanCompletedTask(request, ctask_id=None):
     ctasks = get_ctask_by_id() if ctask_id else get_all_ctasks()
 
     ctasks.delete()
+    touch_users(user_id)
+
     return redirect('todolist:dashboard')